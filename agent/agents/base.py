@@ -6,7 +6,8 @@ Overrides tts_node to inject the guardrail between LLM text output and TTS.
 Data flow:
   LLM streams text
     → tts_node buffers at sentence boundaries
-    → guardrail.check_and_rewrite() per sentence (~5ms clean, ~150ms if flagged)
+    → guardrail.check_and_rewrite_batch() on the sentences ready so far
+      (one moderation request, ~5ms clean, ~150ms if flagged)
     → safe text fed to Agent.default.tts_node → audio frames → student hears it
 
 NOTE: In livekit-agents v1.4, tts_node must return AsyncIterable[rtc.AudioFrame],
@@ -22,6 +23,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
 import time
 from typing import AsyncGenerator, AsyncIterable, Optional
 
@@ -37,6 +39,9 @@ _tts_tracer = _get_tracer("tts-pipeline")
 
 # Sentence-boundary punctuation — fire guardrail per complete sentence
 SENTENCE_ENDINGS = (".", "!", "?", ":", ";")
+# A chunk that ends in sentence punctuation (plus optional whitespace) closes the
+# buffered sentence — one C-level scan per chunk instead of rstrip + endswith loop
+_SENTENCE_END = re.compile("[" + re.escape("".join(SENTENCE_ENDINGS)) + r"]\s*\Z")
 
 
 class GuardedAgent(Agent):
@@ -70,42 +75,63 @@ class GuardedAgent(Agent):
             except AttributeError:
                 pass
 
+            async def _split_sentences(sentences: asyncio.Queue) -> None:
+                """Buffer the LLM stream into sentences; None marks end of stream."""
+                buffer: list[str] = []
+                try:
+                    async for chunk in text:
+                        buffer.append(chunk)
+                        if _SENTENCE_END.search(chunk):
+                            sentences.put_nowait("".join(buffer))
+                            buffer.clear()
+
+                    # Flush any remaining partial sentence at end of stream
+                    remainder = "".join(buffer)
+                    if remainder.strip():
+                        sentences.put_nowait(remainder)
+                finally:
+                    sentences.put_nowait(None)
+
             async def _safe_text_stream() -> AsyncGenerator[str, None]:
-                buffer = ""
-                async for chunk in text:
-                    buffer += chunk
-                    stripped = buffer.rstrip()
-                    if any(stripped.endswith(p) for p in SENTENCE_ENDINGS):
+                # Sentences that complete while a guardrail call is in flight are
+                # moderated together in the next call (one request per batch). The
+                # first sentence is never held back waiting for company.
+                sentences: asyncio.Queue = asyncio.Queue()
+                splitter = asyncio.create_task(_split_sentences(sentences))
+                try:
+                    end_of_stream = False
+                    while not end_of_stream:
+                        batch = [await sentences.get()]
+                        while not sentences.empty():
+                            batch.append(sentences.get_nowait())
+                        if batch[-1] is None:
+                            batch.pop()
+                            end_of_stream = True
+                        if not batch:
+                            break
+
                         t_guardrail_start = time.perf_counter()
-                        safe_text = await guardrail_service.check_and_rewrite(
-                            buffer,
+                        safe_texts = await guardrail_service.check_and_rewrite_batch(
+                            batch,
                             session_id=session_id,
                             agent_name=agent.agent_name,
                         )
-                        t_guardrail_done = time.perf_counter()
-                        with _tts_tracer.start_as_current_span("tts.sentence") as span:
-                            span.set_attribute("sentence_length", len(buffer))
-                            span.set_attribute("guardrail_ms", round((t_guardrail_done - t_guardrail_start) * 1000))
-                            span.set_attribute("was_rewritten", safe_text != buffer)
-                            span.set_attribute("agent_name", agent.agent_name)
-                        yield safe_text
-                        buffer = ""
-
-                # Flush any remaining partial sentence at end of stream
-                if buffer.strip():
-                    t_guardrail_start = time.perf_counter()
-                    safe_text = await guardrail_service.check_and_rewrite(
-                        buffer,
-                        session_id=session_id,
-                        agent_name=agent.agent_name,
-                    )
-                    t_guardrail_done = time.perf_counter()
-                    with _tts_tracer.start_as_current_span("tts.sentence") as span:
-                        span.set_attribute("sentence_length", len(buffer))
-                        span.set_attribute("guardrail_ms", round((t_guardrail_done - t_guardrail_start) * 1000))
-                        span.set_attribute("was_rewritten", safe_text != buffer)
-                        span.set_attribute("agent_name", agent.agent_name)
-                    yield safe_text
+                        guardrail_ms = round((time.perf_counter() - t_guardrail_start) * 1000)
+
+                        for sentence, safe_text in zip(batch, safe_texts):
+                            with _tts_tracer.start_as_current_span("tts.sentence") as span:
+                                span.set_attribute("sentence_length", len(sentence))
+                                span.set_attribute("guardrail_ms", guardrail_ms)
+                                span.set_attribute("guardrail_batch_size", len(batch))
+                                span.set_attribute("was_rewritten", safe_text != sentence)
+                                span.set_attribute("agent_name", agent.agent_name)
+                            yield safe_text
+
+                    # Surface any error raised while reading the LLM stream
+                    await splitter
+                finally:
+                    if not splitter.done():
+                        splitter.cancel()
 
             # Delegate to default TTS — converts text → rtc.AudioFrame
             async for frame in Agent.default.tts_node(agent, _safe_text_stream(), model_settings):
@@ -201,14 +201,15 @@ async def create_english_realtime_session(
         if item.role == "assistant" and content_text:
             # OTEL span for Langfuse visibility into English Realtime session
             with _tracer.start_as_current_span("conversation.item") as span:
-                span.set_attribute("langfuse.session_id", session_userdata.session_id)
-                span.set_attribute("langfuse.user_id", session_userdata.student_identity)
-                span.set_attribute("session.id", session_userdata.session_id)
-                span.set_attribute("user.id", session_userdata.student_identity)
-                span.set_attribute("subject_area", "english")
-                span.set_attribute("role", "assistant")
-                span.set_attribute("session_type", "realtime")
-                span.set_attribute("turn", getattr(session_userdata, "turn_number", 0))
+                if span.is_recording():
+                    span.set_attribute("langfuse.session_id", session_userdata.session_id)
+                    span.set_attribute("langfuse.user_id", session_userdata.student_identity)
+                    span.set_attribute("session.id", session_userdata.session_id)
+                    span.set_attribute("user.id", session_userdata.student_identity)
+                    span.set_attribute("subject_area", "english")
+                    span.set_attribute("role", "assistant")
+                    span.set_attribute("session_type", "realtime")
+                    span.set_attribute("turn", getattr(session_userdata, "turn_number", 0))
 
             # Guardrail check (post-hoc — cannot interrupt Realtime audio already playing)
             result = await guardrail_service.check(content_text)
@@ -245,12 +246,13 @@ async def create_english_realtime_session(
         elif item.role == "user" and content_text:
             # OTEL span for user turns in English Realtime session
             with _tracer.start_as_current_span("conversation.item") as span:
-                span.set_attribute("langfuse.session_id", session_userdata.session_id)
-                span.set_attribute("langfuse.user_id", session_userdata.student_identity)
-                span.set_attribute("session.id", session_userdata.session_id)
-                span.set_attribute("subject_area", "english")
-                span.set_attribute("role", "user")
-                span.set_attribute("session_type", "realtime")
+                if span.is_recording():
+                    span.set_attribute("langfuse.session_id", session_userdata.session_id)
+                    span.set_attribute("langfuse.user_id", session_userdata.student_identity)
+                    span.set_attribute("session.id", session_userdata.session_id)
+                    span.set_attribute("subject_area", "english")
+                    span.set_attribute("role", "user")
+                    span.set_attribute("session_type", "realtime")
 
             # Publish user turns so the transcript is complete on both sides
             payload = json.dumps({
@@ -37,7 +37,13 @@ from agent.agents.orchestrator import OrchestratorAgent
 from agent.agents.english_agent import create_english_realtime_session
 from agent.models.session_state import SessionUserdata
 from agent.services import transcript_store
-from agent.services.langfuse_setup import setup_langfuse_tracing, get_tracer, create_session_trace
+from agent.services.langfuse_setup import (
+    SESSION_FLUSH_TIMEOUT_MS,
+    create_session_trace,
+    flush_tracing,
+    get_tracer,
+    setup_langfuse_tracing,
+)
 
 logger = logging.getLogger(__name__)
 _tracer = None  # initialised after setup_langfuse_tracing() in __main__
@@ -116,7 +122,7 @@ async def pipeline_session_entrypoint(ctx: JobContext):
     )
     if recovered_session_id:
         userdata.session_id = recovered_session_id
-        userdata.current_subject = "orchestrator"  # back at orchestrator after English
+        userdata.route_to("orchestrator")  # back at orchestrator after English
 
     # If there's a pending_question from re-dispatch metadata, it will be injected via
     # generate_reply(user_input=pending_question) in on_enter — suppress the phantom entry.
@@ -249,7 +255,7 @@ async def pipeline_session_entrypoint(ctx: JobContext):
         "session_id": userdata.session_id,
         "student_identity": student_identity,
         "room_name": room_name,
-        "subjects_covered": list(set(userdata.previous_subjects + ([userdata.current_subject] if userdata.current_subject else []))),
+        "subjects_covered": sorted(userdata.subjects_seen),
         "total_turns": userdata.turn_number,
         "escalated": userdata.escalated,
         "escalation_reason": userdata.escalation_reason,
@@ -279,9 +285,10 @@ async def pipeline_session_entrypoint(ctx: JobContext):
         span.set_attribute("session_type", "pipeline")
         span.set_attribute("total_turns", userdata.turn_number)
         span.set_attribute("escalated", userdata.escalated)
-        span.set_attribute("subjects_covered", ",".join(set(
-            userdata.previous_subjects + ([userdata.current_subject] if userdata.current_subject else [])
-        )))
+        span.set_attribute("subjects_covered", ",".join(sorted(userdata.subjects_seen)))
+
+    # Push the session's buffered spans out before the job process is torn down
+    await asyncio.to_thread(flush_tracing, SESSION_FLUSH_TIMEOUT_MS)
 
     logger.info(
         "Pipeline session ended [session=%s, turns=%d, escalated=%s]",
@@ -363,6 +370,8 @@ async def english_session_entrypoint(ctx: JobContext):
         span.set_attribute("session.id", userdata.session_id)
         span.set_attribute("session_type", "realtime_english")
 
+    await asyncio.to_thread(flush_tracing, SESSION_FLUSH_TIMEOUT_MS)
+
     logger.info(
         "English Realtime session ended [session=%s]",
         userdata.session_id
@@ -10,7 +10,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionUserdata:
     """
     Shared across all agent handoffs within a single student session.
@@ -22,6 +22,7 @@ class SessionUserdata:
     current_subject: Optional[str] = None          # "math" | "english" | "history" | None
     speaking_agent: Optional[str] = None           # tracks who is currently speaking (for transcript)
     previous_subjects: list[str] = field(default_factory=list)
+    subjects_seen: set[str] = field(default_factory=set)  # every subject routed to, kept current by route_to()
     turn_number: int = 0
     escalated: bool = False
     escalation_reason: Optional[str] = None
@@ -29,6 +30,10 @@ class SessionUserdata:
     skip_next_user_turns: int = 0  # set by routing fns; suppresses phantom "user" transcript entries injected via generate_reply(user_input=pending_q) in on_enter()
     last_user_input_at: Optional[float] = None  # perf_counter() timestamp of last user speech commit; used for e2e_response_ms OTEL span
 
+    def __post_init__(self) -> None:
+        if self.current_subject:
+            self.subjects_seen.add(self.current_subject)
+
     def advance_turn(self) -> int:
         """Increment and return the current turn number."""
         self.turn_number += 1
@@ -39,6 +44,7 @@ class SessionUserdata:
         if self.current_subject and self.current_subject != subject:
             self.previous_subjects.append(self.current_subject)
         self.current_subject = subject
+        self.subjects_seen.add(subject)
 
     def to_dict(self) -> dict:
         """Serialise to dict for Supabase JSONB storage."""
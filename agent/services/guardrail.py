@@ -6,14 +6,18 @@ Pipeline:
   2. If flagged: rewrite(text) → Claude Haiku age-appropriate rewrite (~100–150ms)
   3. log_guardrail_event() → Supabase guardrail_events table
 
-check_and_rewrite() combines steps 1–3 for use in tts_node.
+check_and_rewrite() combines steps 1–3 for a single text.
+check_batch() / check_and_rewrite_batch() moderate several texts in one request
+(the moderation endpoint accepts a list input); tts_node uses the batched path.
 """
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 import os
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
 
 import time
 
@@ -24,8 +28,17 @@ from opentelemetry import trace
 logger = logging.getLogger(__name__)
 _tracer = trace.get_tracer("guardrail")
 
-_openai_client: Optional[openai.AsyncOpenAI] = None
-_anthropic_client: Optional[anthropic.AsyncAnthropic] = None
+_openai_client: openai.AsyncOpenAI | None = None
+_anthropic_client: anthropic.AsyncAnthropic | None = None
+
+# Rewrites keyed on a digest of the flagged text. Repeat offenders (the LLM tends
+# to repeat itself) skip the Haiku roundtrip; LRU-evicted beyond the max size.
+REWRITE_CACHE_MAXSIZE = 1024
+_rewrite_cache: OrderedDict[str, str] = OrderedDict()
+# Rewrites currently awaiting Haiku — concurrent callers for the same text share one
+_rewrite_inflight: dict[str, asyncio.Future] = {}
+# Spoken instead when the rewrite fails (or its owning call is cancelled); never cached
+_REWRITE_FALLBACK = "I'm here to help you learn. Let me rephrase that in a better way."
 
 
 def _get_openai() -> openai.AsyncOpenAI:
@@ -77,6 +90,44 @@ Be clear, friendly, and encouraging.
 Respond with ONLY the rewritten text — no preamble, no explanation."""
 
 
+def _to_moderation_result(result) -> ModerationResult:
+    """Convert one omni-moderation-latest result into a ModerationResult."""
+    flagged_categories = []
+    highest_score = 0.0
+
+    # Extract flagged categories and scores
+    categories = result.categories
+    scores = result.category_scores
+
+    cat_map = {
+        "harassment": (categories.harassment, scores.harassment),
+        "harassment/threatening": (categories.harassment_threatening, scores.harassment_threatening),
+        "hate": (categories.hate, scores.hate),
+        "hate/threatening": (categories.hate_threatening, scores.hate_threatening),
+        "sexual": (categories.sexual, scores.sexual),
+        "sexual/minors": (categories.sexual_minors, scores.sexual_minors),
+        "violence": (categories.violence, scores.violence),
+        "violence/graphic": (categories.violence_graphic, scores.violence_graphic),
+        "self-harm": (getattr(categories, "self_harm", False), getattr(scores, "self_harm", 0.0)),
+        "self-harm/intent": (getattr(categories, "self_harm_intent", False), getattr(scores, "self_harm_intent", 0.0)),
+        "self-harm/instructions": (getattr(categories, "self_harm_instructions", False), getattr(scores, "self_harm_instructions", 0.0)),
+        "illicit": (getattr(categories, "illicit", False), getattr(scores, "illicit", 0.0)),
+        "illicit/violent": (getattr(categories, "illicit_violent", False), getattr(scores, "illicit_violent", 0.0)),
+    }
+
+    for category, (is_flagged, score) in cat_map.items():
+        if is_flagged:
+            flagged_categories.append(category)
+        if score > highest_score:
+            highest_score = score
+
+    return ModerationResult(
+        flagged=result.flagged,
+        categories=flagged_categories,
+        highest_score=highest_score,
+    )
+
+
 async def check(text: str) -> ModerationResult:
     """
     Run OpenAI omni-moderation-latest on the given text.
@@ -91,42 +142,7 @@ async def check(text: str) -> ModerationResult:
                 model="omni-moderation-latest",
                 input=text,
             )
-            result = response.results[0]
-
-            flagged_categories = []
-            highest_score = 0.0
-
-            # Extract flagged categories and scores
-            categories = result.categories
-            scores = result.category_scores
-
-            cat_map = {
-                "harassment": (categories.harassment, scores.harassment),
-                "harassment/threatening": (categories.harassment_threatening, scores.harassment_threatening),
-                "hate": (categories.hate, scores.hate),
-                "hate/threatening": (categories.hate_threatening, scores.hate_threatening),
-                "sexual": (categories.sexual, scores.sexual),
-                "sexual/minors": (categories.sexual_minors, scores.sexual_minors),
-                "violence": (categories.violence, scores.violence),
-                "violence/graphic": (categories.violence_graphic, scores.violence_graphic),
-                "self-harm": (getattr(categories, "self_harm", False), getattr(scores, "self_harm", 0.0)),
-                "self-harm/intent": (getattr(categories, "self_harm_intent", False), getattr(scores, "self_harm_intent", 0.0)),
-                "self-harm/instructions": (getattr(categories, "self_harm_instructions", False), getattr(scores, "self_harm_instructions", 0.0)),
-                "illicit": (getattr(categories, "illicit", False), getattr(scores, "illicit", 0.0)),
-                "illicit/violent": (getattr(categories, "illicit_violent", False), getattr(scores, "illicit_violent", 0.0)),
-            }
-
-            for category, (is_flagged, score) in cat_map.items():
-                if is_flagged:
-                    flagged_categories.append(category)
-                if score > highest_score:
-                    highest_score = score
-
-            moderation_result = ModerationResult(
-                flagged=result.flagged,
-                categories=flagged_categories,
-                highest_score=highest_score,
-            )
+            moderation_result = _to_moderation_result(response.results[0])
             span.set_attribute("flagged", moderation_result.flagged)
             span.set_attribute("highest_score", round(moderation_result.highest_score, 4))
             span.set_attribute("check_ms", round((time.perf_counter() - t0) * 1000))
@@ -139,11 +155,87 @@ async def check(text: str) -> ModerationResult:
             return ModerationResult(flagged=False, categories=[], highest_score=0.0)
 
 
+async def check_batch(texts: list[str]) -> list[ModerationResult]:
+    """
+    Run omni-moderation-latest on several texts in a single request.
+    Returns one ModerationResult per text, in input order.
+    """
+    if not texts:
+        return []
+
+    t0 = time.perf_counter()
+    with _tracer.start_as_current_span("guardrail.check_batch") as span:
+        span.set_attribute("batch_size", len(texts))
+        span.set_attribute("text_length", sum(len(t) for t in texts))
+        try:
+            client = _get_openai()
+            response = await client.moderations.create(
+                model="omni-moderation-latest",
+                input=texts,
+            )
+            results = [_to_moderation_result(r) for r in response.results]
+            if len(results) != len(texts):
+                raise ValueError(
+                    f"moderation returned {len(results)} results for {len(texts)} inputs"
+                )
+            span.set_attribute("flagged_count", sum(r.flagged for r in results))
+            span.set_attribute("check_ms", round((time.perf_counter() - t0) * 1000))
+            return results
+        except Exception:
+            logger.exception("Batched moderation check failed (batch_size=%d)", len(texts))
+            span.set_attribute("error", True)
+            span.set_attribute("check_ms", round((time.perf_counter() - t0) * 1000))
+            # Fail safe: do not flag, let content through
+            return [
+                ModerationResult(flagged=False, categories=[], highest_score=0.0)
+                for _ in texts
+            ]
+
+
+def _rewrite_cache_key(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
 async def rewrite(text: str) -> str:
     """
     Rewrite flagged text using Claude Haiku for age-appropriateness.
-    Returns the rewritten text, or the original if rewrite fails.
+    Returns the rewritten text, or a safe fallback if rewrite fails.
+
+    Successful rewrites are cached; identical concurrent calls share one request.
+    The fallback is never cached, so a transient failure is retried next time.
     """
+    key = _rewrite_cache_key(text)
+
+    cached = _rewrite_cache.get(key)
+    if cached is not None:
+        _rewrite_cache.move_to_end(key)
+        return cached
+
+    inflight = _rewrite_inflight.get(key)
+    if inflight is not None:
+        # Shielded: a cancelled joiner must not cancel the future other callers share
+        return await asyncio.shield(inflight)
+
+    future = asyncio.get_running_loop().create_future()
+    _rewrite_inflight[key] = future
+    rewritten = None
+    try:
+        rewritten = await _rewrite_uncached(text)
+        if rewritten is not None:
+            _rewrite_cache[key] = rewritten
+            if len(_rewrite_cache) > REWRITE_CACHE_MAXSIZE:
+                _rewrite_cache.popitem(last=False)
+    finally:
+        del _rewrite_inflight[key]
+        # Always resolve the shared future — even if this caller was cancelled — so
+        # joined callers get the fallback rather than a CancelledError
+        if not future.done():
+            future.set_result(_REWRITE_FALLBACK if rewritten is None else rewritten)
+    return _REWRITE_FALLBACK if rewritten is None else rewritten
+
+
+async def _rewrite_uncached(text: str) -> str | None:
+    """Call Claude Haiku; returns None if the rewrite fails."""
     t0 = time.perf_counter()
     with _tracer.start_as_current_span("guardrail.rewrite") as span:
         span.set_attribute("original_length", len(text))
@@ -164,7 +256,7 @@ async def rewrite(text: str) -> str:
             logger.exception("Guardrail rewrite failed — returning safe fallback")
             span.set_attribute("error", True)
             span.set_attribute("rewrite_ms", round((time.perf_counter() - t0) * 1000))
-            return "I'm here to help you learn. Let me rephrase that in a better way."
+            return None
 
 
 async def log_guardrail_event(
@@ -193,22 +285,13 @@ async def log_guardrail_event(
         logger.exception("Failed to log guardrail event for session %s", session_id)
 
 
-async def check_and_rewrite(
+async def _rewrite_flagged(
     text: str,
+    result: ModerationResult,
     session_id: str,
-    agent_name: str = "unknown",
+    agent_name: str,
 ) -> str:
-    """
-    Combined check + optional rewrite + audit log.
-    Called from GuardedAgent.tts_node() per sentence.
-
-    Returns safe text (rewritten if flagged, original if clean).
-    """
-    result = await check(text)
-
-    if not result.flagged:
-        return text
-
+    """Rewrite one flagged text and fire off its audit log."""
     logger.warning(
         "Content flagged [session=%s, agent=%s, categories=%s]",
         session_id, agent_name, result.categories
@@ -217,7 +300,6 @@ async def check_and_rewrite(
     safe_text = await rewrite(text)
 
     # Fire-and-forget audit log (don't block TTS)
-    import asyncio
     asyncio.create_task(log_guardrail_event(
         session_id=session_id,
         agent_name=agent_name,
@@ -228,3 +310,45 @@ async def check_and_rewrite(
     ))
 
     return safe_text
+
+
+async def check_and_rewrite(
+    text: str,
+    session_id: str,
+    agent_name: str = "unknown",
+) -> str:
+    """
+    Combined check + optional rewrite + audit log for a single text.
+
+    Returns safe text (rewritten if flagged, original if clean).
+    """
+    result = await check(text)
+
+    if not result.flagged:
+        return text
+
+    return await _rewrite_flagged(text, result, session_id, agent_name)
+
+
+async def check_and_rewrite_batch(
+    texts: list[str],
+    session_id: str,
+    agent_name: str = "unknown",
+) -> list[str]:
+    """
+    Batched check_and_rewrite: one moderation request for all texts, then the
+    flagged ones are rewritten concurrently. Called from GuardedAgent.tts_node().
+
+    Returns safe texts in input order (rewritten if flagged, original if clean).
+    """
+    results = await check_batch(texts)
+
+    safe_texts = list(texts)
+    flagged = [i for i, result in enumerate(results) if result.flagged]
+    if flagged:
+        rewritten = await asyncio.gather(*(
+            _rewrite_flagged(texts[i], results[i], session_id, agent_name) for i in flagged
+        ))
+        for i, safe_text in zip(flagged, rewritten):
+            safe_texts[i] = safe_text
+    return safe_texts
@@ -9,6 +9,7 @@ See PLAN.md Critical Gotchas #13.
 """
 from __future__ import annotations
 
+import atexit
 import base64
 import logging
 import os
@@ -16,11 +17,44 @@ import os
 from opentelemetry import trace
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import: stamped on the tracer resource and every session trace
+_SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "learning-voice-agent")
+
+# BatchSpanProcessor tuning: span end is a queue append on the audio/routing path;
+# export runs on the processor's worker thread in batches.
+SPAN_QUEUE_SIZE = 4096
+SPAN_SCHEDULE_DELAY_MS = 1000
+SPAN_EXPORT_BATCH_SIZE = 256
+SPAN_EXPORT_TIMEOUT_MS = 10000
+
+# A dead collector must not stall the worker: each export (retries included) gives
+# up after SPAN_EXPORTER_TIMEOUT_S, session teardown waits at most
+# SESSION_FLUSH_TIMEOUT_MS for its spans, and process exit waits at most
+# SHUTDOWN_FLUSH_TIMEOUT_MS for queued spans before dropping them.
+SPAN_EXPORTER_TIMEOUT_S = 2
+SESSION_FLUSH_TIMEOUT_MS = 2000
+SHUTDOWN_FLUSH_TIMEOUT_MS = 2000
+
+
+def _sample_ratio() -> float:
+    """
+    Fraction of new traces to record, from OTEL_SAMPLE_RATIO (default 1.0 = all).
+    Invalid values fall back to 1.0; out-of-range values are clamped to [0, 1].
+    """
+    raw = os.environ.get("OTEL_SAMPLE_RATIO", "1.0")
+    try:
+        ratio = float(raw)
+    except ValueError:
+        logger.warning("Invalid OTEL_SAMPLE_RATIO=%r — sampling all traces", raw)
+        return 1.0
+    return min(max(ratio, 0.0), 1.0)
+
 
 def setup_langfuse_tracing() -> TracerProvider | None:
     """
@@ -46,21 +80,66 @@ def setup_langfuse_tracing() -> TracerProvider | None:
     exporter = OTLPSpanExporter(
         endpoint=f"{langfuse_host}/api/public/otel/v1/traces",
         headers={"Authorization": f"Basic {credentials}"},
+        timeout=SPAN_EXPORTER_TIMEOUT_S,
     )
 
     resource = Resource.create({
-        "service.name": "learning-voice-agent",
+        "service.name": _SERVICE_NAME,
         "service.version": "1.0.0",
     })
 
-    provider = TracerProvider(resource=resource)
-    provider.add_span_processor(BatchSpanProcessor(exporter))
+    # Head sampling: the ratio decides at each root span (session.start, or a
+    # detached routing/guardrail span); child spans follow their parent's decision.
+    # shutdown_on_exit=False: the SDK's own atexit hook waits up to 30s per
+    # processor; _shutdown_tracing bounds it instead.
+    provider = TracerProvider(
+        resource=resource,
+        sampler=ParentBased(root=TraceIdRatioBased(_sample_ratio())),
+        shutdown_on_exit=False,
+    )
+    provider.add_span_processor(BatchSpanProcessor(
+        exporter,
+        max_queue_size=SPAN_QUEUE_SIZE,
+        schedule_delay_millis=SPAN_SCHEDULE_DELAY_MS,
+        max_export_batch_size=SPAN_EXPORT_BATCH_SIZE,
+        export_timeout_millis=SPAN_EXPORT_TIMEOUT_MS,
+    ))
     trace.set_tracer_provider(provider)
+    atexit.register(_shutdown_tracing, provider, exporter)
 
     logger.info("Langfuse OTEL tracing configured → %s", langfuse_host)
     return provider
 
 
+def _shutdown_tracing(provider: TracerProvider, exporter) -> None:
+    """
+    atexit hook: flush queued spans for at most SHUTDOWN_FLUSH_TIMEOUT_MS, then shut
+    down. If the flush times out (collector unreachable), only the exporter is shut
+    down: that aborts the export in flight and drops the rest of the queue, where
+    provider.shutdown() would drain it batch by batch and shut the exporter down a
+    second time. The processor's worker is a daemon thread, so exit doesn't wait on it.
+    """
+    if provider.force_flush(SHUTDOWN_FLUSH_TIMEOUT_MS):
+        provider.shutdown()
+    else:
+        logger.warning("OTEL span flush timed out at exit — dropping unexported spans")
+        exporter.shutdown()
+
+
+def flush_tracing(timeout_millis: int = SPAN_EXPORT_TIMEOUT_MS) -> bool:
+    """
+    Export any spans still queued in the BatchSpanProcessor.
+
+    Blocks the calling thread until the export completes or times out — call it via
+    asyncio.to_thread() from async code. Returns False if the flush timed out;
+    True (no-op) when tracing was never configured.
+    """
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        return True
+    return provider.force_flush(timeout_millis)
+
+
 def get_tracer(name: str = "learning-agent"):
     """Get an OTEL tracer for manual span creation."""
     return trace.get_tracer(name)
@@ -101,5 +180,5 @@ def create_session_trace(
         "session.id": session_id,
         "user.id": student_identity,
         "room.name": room_name,
-        "service.name": "learning-voice-agent",
+        "service.name": _SERVICE_NAME,
     }
@@ -3,10 +3,38 @@ Shared pytest fixtures for agent unit tests.
 
 All external API calls (OpenAI, Anthropic, Supabase, LiveKit) are mocked here.
 Tests run without Docker or network access.
+
+The suite runs under pytest-xdist (addopts in pyproject.toml). Unit tests share no
+state — env vars, guardrail singletons and the rewrite cache are swapped via
+monkeypatch and restored per test — so they spread freely across workers. Session
+fixtures (guardrail_module, pipeline_agents) are built once per worker. An
+xdist_group on a unit test only keeps cases that share a module-scoped fixture on
+one worker (test_routing_speaking_agent).
 """
-import os
+import asyncio
+import dataclasses
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
 
+from agent.tests.fixtures.tracing import FakeTracer
+
+try:
+    import uvloop
+except ImportError:  # optional dev dependency (not available on Windows)
+    uvloop = None
+
+
+def pytest_asyncio_loop_factories(config, item):
+    """
+    Run every async test and fixture on uvloop when it is installed — cheaper
+    scheduling for the many tiny AsyncMock awaits. Falls back to the stdlib loop.
+    """
+    if uvloop is None:
+        return {"asyncio": asyncio.new_event_loop}
+    return {"uvloop": uvloop.new_event_loop}
+
 
 @pytest.fixture(autouse=True)
 def mock_env_vars(monkeypatch):
@@ -18,3 +46,140 @@ def mock_env_vars(monkeypatch):
     monkeypatch.setenv("LIVEKIT_API_SECRET", "test-lk-secret")
     monkeypatch.setenv("LANGFUSE_PUBLIC_KEY", "test-lf-public")
     monkeypatch.setenv("LANGFUSE_SECRET_KEY", "test-lf-secret")
+
+
+@pytest.fixture(scope="session")
+def guardrail_module():
+    """agent.services.guardrail, imported once per session (per worker under xdist)."""
+    import agent.services.guardrail as gs
+
+    return gs
+
+
+@pytest.fixture(autouse=True)
+def fresh_rewrite_cache(monkeypatch):
+    """Give each test an empty guardrail rewrite cache so mocked rewrites never leak."""
+    import agent.services.guardrail as gs
+
+    monkeypatch.setattr(gs, "_rewrite_cache", gs.OrderedDict())
+    monkeypatch.setattr(gs, "_rewrite_inflight", {})
+
+
+@pytest.fixture
+def openai_moderation_mock(guardrail_module, monkeypatch):
+    """Swap the guardrail's OpenAI singleton for a mock; returns moderations.create."""
+    client = MagicMock()
+    client.moderations.create = AsyncMock()
+    monkeypatch.setattr(guardrail_module, "_openai_client", client)
+    return client.moderations.create
+
+
+@pytest.fixture
+def anthropic_messages_mock(guardrail_module, monkeypatch):
+    """Swap the guardrail's Anthropic singleton for a mock; returns messages.create."""
+    client = MagicMock()
+    client.messages.create = AsyncMock()
+    monkeypatch.setattr(guardrail_module, "_anthropic_client", client)
+    return client.messages.create
+
+
+@pytest.fixture(scope="session")
+def _template_userdata():
+    """SessionUserdata built once; make_mock_context hands out copies."""
+    from agent.models.session_state import SessionUserdata
+
+    return SessionUserdata(student_identity="alice", room_name="room-1", session_id="sess-abc")
+
+
+@pytest.fixture
+def make_mock_context(_template_userdata):
+    """
+    Factory for a minimal RunContext-like context: make_mock_context(**overrides)
+    returns (context, userdata).
+
+    Routing impls mutate userdata (route_to, advance_turn), so every call gets its
+    own copy — replace() copies field values, hence the fresh previous_subjects list
+    and subjects_seen set.
+    The context is plain namespaces: the impls only read session.userdata and
+    session.history, so MagicMock's child-mock scaffolding would go unused.
+    """
+    def _make(session_id="sess-abc", room_name="room-1", student_identity="alice"):
+        userdata = dataclasses.replace(
+            _template_userdata,
+            session_id=session_id,
+            room_name=room_name,
+            student_identity=student_identity,
+            previous_subjects=[],
+            subjects_seen=set(),
+        )
+        session = SimpleNamespace(userdata=userdata, history=SimpleNamespace(messages=list))
+        return SimpleNamespace(session=session), userdata
+
+    return _make
+
+
+@pytest.fixture
+def created_tasks(monkeypatch):
+    """
+    Stub asyncio.create_task: each coroutine is closed unrun (no "never awaited"
+    warning) and its __qualname__ recorded. Returns the list of qualnames. Calls on
+    mocked services (e.g. a MagicMock transcript_store) pass non-coroutines; those
+    are ignored.
+    """
+    qualnames: list[str] = []
+
+    def _fake_create_task(coro, **kwargs):
+        if asyncio.iscoroutine(coro):
+            qualnames.append(coro.__qualname__)
+            coro.close()
+        return MagicMock()
+
+    monkeypatch.setattr("asyncio.create_task", _fake_create_task)
+    return qualnames
+
+
+@pytest.fixture
+def dispatch_mocks(monkeypatch, created_tasks):
+    """
+    Mock everything the routing/dispatch impls touch outside userdata: LiveKitAPI,
+    the routing tracer, transcript_store and asyncio.create_task (via created_tasks).
+
+    Returns a namespace with:
+      api          — LiveKitAPI context value; api.agent_dispatch.create_dispatch is an AsyncMock
+      lk_instance  — the LiveKitAPI() instance; set __aenter__.side_effect to fail dispatch
+      tracer       — FakeTracer installed as the routing tracer; read tracer.spans[i].attrs
+      tasks        — __qualname__ of every coroutine handed to asyncio.create_task
+    """
+    mock_api = MagicMock()
+    mock_api.agent_dispatch.create_dispatch = AsyncMock()
+
+    mock_lk_instance = MagicMock()
+    mock_lk_instance.__aenter__ = AsyncMock(return_value=mock_api)
+    mock_lk_instance.__aexit__ = AsyncMock(return_value=False)
+
+    tracer = FakeTracer()
+
+    monkeypatch.setattr("livekit.api.LiveKitAPI", MagicMock(return_value=mock_lk_instance))
+    monkeypatch.setattr("agent.tools.routing.tracer", tracer)
+    monkeypatch.setattr("agent.tools.routing.transcript_store", MagicMock())
+
+    return SimpleNamespace(
+        api=mock_api, lk_instance=mock_lk_instance, tracer=tracer, tasks=created_tasks
+    )
+
+
+@pytest.fixture(scope="session")
+def pipeline_agents():
+    """
+    Pipeline agent classes keyed by agent name, with the TTS voice each must use.
+    Imported once per session; add a new pipeline agent here rather than new tests.
+    """
+    from agent.agents.history_agent import HistoryAgent
+    from agent.agents.math_agent import MathAgent
+    from agent.agents.orchestrator import OrchestratorAgent
+
+    return {
+        "orchestrator": (OrchestratorAgent, "alloy"),
+        "math": (MathAgent, "onyx"),
+        "history": (HistoryAgent, "fable"),
+    }
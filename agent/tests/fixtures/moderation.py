@@ -0,0 +1,66 @@
+"""
+Stand-ins for the OpenAI omni-moderation-latest response, for mocked guardrail tests.
+
+guardrail.check() only reads attributes, so frozen slots dataclasses replace
+SimpleNamespace trees: no per-instance __dict__, and a built response can be shared
+between tests. Every category defaults to unflagged with a 0.01 score — pass only the
+fields a test cares about.
+
+  ModerationCategories / ModerationScores   result.categories / result.category_scores
+  ModerationApiResult / ModerationApiResponse   results[0] / the response itself
+  category_attr()                           API category name → attribute name
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class ModerationCategories:
+    harassment: bool = False
+    harassment_threatening: bool = False
+    hate: bool = False
+    hate_threatening: bool = False
+    sexual: bool = False
+    sexual_minors: bool = False
+    violence: bool = False
+    violence_graphic: bool = False
+    self_harm: bool = False
+    self_harm_intent: bool = False
+    self_harm_instructions: bool = False
+    illicit: bool = False
+    illicit_violent: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class ModerationScores:
+    harassment: float = 0.01
+    harassment_threatening: float = 0.01
+    hate: float = 0.01
+    hate_threatening: float = 0.01
+    sexual: float = 0.01
+    sexual_minors: float = 0.01
+    violence: float = 0.01
+    violence_graphic: float = 0.01
+    self_harm: float = 0.01
+    self_harm_intent: float = 0.01
+    self_harm_instructions: float = 0.01
+    illicit: float = 0.01
+    illicit_violent: float = 0.01
+
+
+@dataclass(frozen=True, slots=True)
+class ModerationApiResult:
+    flagged: bool
+    categories: ModerationCategories
+    category_scores: ModerationScores
+
+
+@dataclass(frozen=True, slots=True)
+class ModerationApiResponse:
+    results: tuple[ModerationApiResult, ...]
+
+
+def category_attr(category: str) -> str:
+    """'self-harm/intent' → 'self_harm_intent' (API category name → attribute name)."""
+    return category.replace("/", "_").replace("-", "_")
@@ -14,24 +14,46 @@ Sets:
   SPECIALIST_OFFTOPIC    9  Cross-subject questions (math-gets-history, etc.)
   ESCALATION_SIGNALS     6  Distress / welfare signals → escalate_to_teacher
   GUARDRAIL_INPUTS      13  One per OpenAI moderation category (mocked API)
+                            (also indexed by category: GUARDRAIL_INPUTS_BY_CATEGORY)
   EDGE_CASES             5  Ambiguous / multi-subject questions
 
 Total: 63 fixture entries.
+
+Each set also has a *_PARAMS companion: the same rows wrapped in pytest.param with
+compact "<category>-<index>" IDs, so parametrize never falls back to auto-ID generation.
 """
 from __future__ import annotations
 
+from collections.abc import Mapping
 from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Literal, get_args
+
+try:
+    import pytest
+except ImportError:  # dataset stays importable outside the test environment
+    pytest = None
+
+
+AgentName = Literal["math", "history", "english", "orchestrator"]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SyntheticQuestion:
-    question: str          # natural-language question text
-    expected_agent: str    # "math" | "history" | "english" | "orchestrator"
-    category: str          # broad topic bucket
-    rationale: str         # why this question belongs to this agent
+    question: str              # natural-language question text
+    expected_agent: AgentName  # agent that should end up handling the question
+    category: str              # broad topic bucket
+    rationale: str             # why this question belongs to this agent
 
+    def __post_init__(self) -> None:
+        # Catch typos in fixture rows at import time, not as a confusing test failure
+        if self.expected_agent not in get_args(AgentName):
+            raise ValueError(
+                f"Unknown expected_agent {self.expected_agent!r} for {self.question!r}"
+            )
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class GuardrailInput:
     input_text: str    # innocuous placeholder — moderation API is mocked
     category: str      # OpenAI moderation category name (exact string key)
@@ -41,7 +63,7 @@ class GuardrailInput:
 # ---------------------------------------------------------------------------
 # MATH_QUESTIONS — 10 questions that clearly belong to MathAgent
 # ---------------------------------------------------------------------------
-MATH_QUESTIONS: list[SyntheticQuestion] = [
+MATH_QUESTIONS: tuple[SyntheticQuestion, ...] = (
     SyntheticQuestion(
         question="What is 7 times 8?",
         expected_agent="math",
@@ -102,13 +124,13 @@ MATH_QUESTIONS: list[SyntheticQuestion] = [
         category="arithmetic",
         rationale="Number conversion — applied arithmetic",
     ),
-]
+)
 
 
 # ---------------------------------------------------------------------------
 # HISTORY_QUESTIONS — 10 questions that clearly belong to HistoryAgent
 # ---------------------------------------------------------------------------
-HISTORY_QUESTIONS: list[SyntheticQuestion] = [
+HISTORY_QUESTIONS: tuple[SyntheticQuestion, ...] = (
     SyntheticQuestion(
         question="Who was Julius Caesar?",
         expected_agent="history",
@@ -169,13 +191,13 @@ HISTORY_QUESTIONS: list[SyntheticQuestion] = [
         category="ancient_history",
         rationale="Decline of Western Rome — late antiquity",
     ),
-]
+)
 
 
 # ---------------------------------------------------------------------------
 # ENGLISH_QUESTIONS — 10 questions that clearly belong to EnglishAgent
 # ---------------------------------------------------------------------------
-ENGLISH_QUESTIONS: list[SyntheticQuestion] = [
+ENGLISH_QUESTIONS: tuple[SyntheticQuestion, ...] = (
     SyntheticQuestion(
         question="What is an adjective?",
         expected_agent="english",
@@ -236,7 +258,7 @@ ENGLISH_QUESTIONS: list[SyntheticQuestion] = [
         category="reading",
         rationale="Reading skills — comprehension strategies",
     ),
-]
+)
 
 
 # ---------------------------------------------------------------------------
@@ -244,7 +266,7 @@ ENGLISH_QUESTIONS: list[SyntheticQuestion] = [
 # These represent off-topic questions that a specialist should hand back to
 # the orchestrator rather than attempting to answer.
 # ---------------------------------------------------------------------------
-SPECIALIST_OFFTOPIC: list[SyntheticQuestion] = [
+SPECIALIST_OFFTOPIC: tuple[SyntheticQuestion, ...] = (
     # Math agent receives history question
     SyntheticQuestion(
         question="Who was Napoleon Bonaparte?",
@@ -302,14 +324,14 @@ SPECIALIST_OFFTOPIC: list[SyntheticQuestion] = [
         category="completely_offtopic",
         rationale="Non-educational question — should route back to orchestrator",
     ),
-]
+)
 
 
 # ---------------------------------------------------------------------------
 # ESCALATION_SIGNALS — 6 distress / welfare signals
 # These represent student inputs that should trigger escalate_to_teacher.
 # ---------------------------------------------------------------------------
-ESCALATION_SIGNALS: list[SyntheticQuestion] = [
+ESCALATION_SIGNALS: tuple[SyntheticQuestion, ...] = (
     SyntheticQuestion(
         question="I'm really confused and upset, nothing makes sense",
         expected_agent="orchestrator",
@@ -346,7 +368,7 @@ ESCALATION_SIGNALS: list[SyntheticQuestion] = [
         category="distress_isolation",
         rationale="Isolation / welfare signal — teacher must be notified",
     ),
-]
+)
 
 
 # ---------------------------------------------------------------------------
@@ -355,7 +377,7 @@ ESCALATION_SIGNALS: list[SyntheticQuestion] = [
 # mocked in tests so actual harmful content is never needed.
 # Only the category label matters for parametrised assertions.
 # ---------------------------------------------------------------------------
-GUARDRAIL_INPUTS: list[GuardrailInput] = [
+GUARDRAIL_INPUTS: tuple[GuardrailInput, ...] = (
     GuardrailInput(
         input_text="[harassment test input — placeholder]",
         category="harassment",
@@ -421,13 +443,19 @@ GUARDRAIL_INPUTS: list[GuardrailInput] = [
         category="illicit/violent",
         description="Illicit activity with violent component",
     ),
-]
+)
+
+
+# Read-only category → input index, for tests that need one specific category
+GUARDRAIL_INPUTS_BY_CATEGORY: Mapping[str, GuardrailInput] = MappingProxyType(
+    {g.category: g for g in GUARDRAIL_INPUTS}
+)
 
 
 # ---------------------------------------------------------------------------
 # EDGE_CASES — 5 ambiguous / multi-subject questions
 # ---------------------------------------------------------------------------
-EDGE_CASES: list[SyntheticQuestion] = [
+EDGE_CASES: tuple[SyntheticQuestion, ...] = (
     SyntheticQuestion(
         question="What fraction of Roman soldiers were cavalry?",
         expected_agent="orchestrator",
@@ -458,4 +486,28 @@ EDGE_CASES: list[SyntheticQuestion] = [
         category="general_greeting",
         rationale="Introductory message — no routing yet, stays with orchestrator",
     ),
-]
+)
+
+
+# ---------------------------------------------------------------------------
+# *_PARAMS — pytest.param wrappers with precomputed IDs
+# Use as: @pytest.mark.parametrize("question", MATH_PARAMS)
+# ---------------------------------------------------------------------------
+def _as_params(items: tuple[SyntheticQuestion, ...] | tuple[GuardrailInput, ...]) -> tuple:
+    """
+    Wrap fixture rows in pytest.param with short, unique "<category>-<index>" IDs.
+    Built once at import so parametrize decorators reuse the same tuples; without
+    pytest installed the raw rows are returned unchanged.
+    """
+    if pytest is None:
+        return items
+    return tuple(pytest.param(item, id=f"{item.category}-{i}") for i, item in enumerate(items))
+
+
+MATH_PARAMS = _as_params(MATH_QUESTIONS)
+HISTORY_PARAMS = _as_params(HISTORY_QUESTIONS)
+ENGLISH_PARAMS = _as_params(ENGLISH_QUESTIONS)
+SPECIALIST_OFFTOPIC_PARAMS = _as_params(SPECIALIST_OFFTOPIC)
+ESCALATION_PARAMS = _as_params(ESCALATION_SIGNALS)
+GUARDRAIL_PARAMS = _as_params(GUARDRAIL_INPUTS)
+EDGE_CASE_PARAMS = _as_params(EDGE_CASES)
@@ -0,0 +1,95 @@
+"""
+Stand-ins for an OTEL tracer and span, for tests that assert on span names/attributes.
+
+The code under test calls tracer.start_as_current_span(name) (as a context manager)
+or tracer.start_span(name) ... span.end(), sets attributes with set_attribute(s)()
+and records failures with record_exception() / set_status(). These plain classes
+record exactly that — no MagicMock
+child-mock allocation, and attributes land in a dict the test reads directly:
+
+  tracer = FakeTracer()
+  monkeypatch.setattr("agent.tools.routing.tracer", tracer)
+  ...
+  assert tracer.names == ["routing.decision"]
+  assert tracer.spans[0].attrs["to_agent"] == "math"
+"""
+from __future__ import annotations
+
+from typing import Self
+
+
+class FakeSpan:
+    """
+    Records set_attribute calls in .attrs, record_exception calls in .exceptions and
+    the last set_status in .status; is its own context manager.
+    """
+
+    def __init__(self, recording: bool = True) -> None:
+        self.attrs: dict = {}
+        self.exceptions: list[BaseException] = []
+        self.status = None
+        self.ended = False
+        self._recording = recording
+
+    def is_recording(self) -> bool:
+        return self._recording
+
+    def set_attribute(self, key, value) -> None:
+        self.attrs[key] = value
+
+    def set_attributes(self, attributes: dict) -> None:
+        self.attrs.update(attributes)
+
+    def record_exception(self, exception: BaseException, *args, **kwargs) -> None:
+        self.exceptions.append(exception)
+
+    def set_status(self, status, *args, **kwargs) -> None:
+        self.status = status
+
+    def end(self) -> None:
+        self.ended = True
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.end()
+        return False
+
+
+class FakeTracer:
+    """
+    Records every span opened: .names in call order, .spans the matching FakeSpans.
+    recording=False hands out non-recording spans, as a sampled-out trace would.
+    """
+
+    def __init__(self, recording: bool = True) -> None:
+        self.names: list[str] = []
+        self.spans: list[FakeSpan] = []
+        self._recording = recording
+
+    def start_span(self, name: str, *args, **kwargs) -> FakeSpan:
+        self.names.append(name)
+        span = FakeSpan(self._recording)
+        self.spans.append(span)
+        return span
+
+    # Same recording; the fake has no context to make the span current in
+    start_as_current_span = start_span
+
+
+def span_attrs(span) -> dict:
+    """
+    Attributes recorded on a span: FakeSpan.attrs directly, or — for a MagicMock
+    span — one pass over its set_attribute / set_attributes calls, in call order.
+    """
+    attrs = getattr(span, "attrs", None)
+    if isinstance(attrs, dict):
+        return attrs
+    recorded = {}
+    for name, args, _ in span.mock_calls:
+        if name == "set_attribute":
+            recorded[args[0]] = args[1]
+        elif name == "set_attributes":
+            recorded.update(args[0])
+    return recorded
@@ -3,32 +3,143 @@ Integration test conftest — real API key capture and singleton reset.
 
 Keys are captured at module-load time (before any monkeypatching by the parent
 conftest's autouse mock_env_vars fixture). This is the only safe moment to read them.
+
+The key check, real-key env override and guardrail singleton reset all run once per
+session (_real_api_session). The parent's mock_env_vars is overridden here with a
+no-op, so fake keys are never re-injected between integration tests.
+
+anthropic_client / openai_client are shared across the session so every test reuses
+one HTTP connection pool. Tests using them must run on the session event loop:
+    pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+Every integration module is marked xdist_group("live_api"). Under
+    pytest -n 4 --dist=loadgroup
+they all land on one worker, so that worker's session clients and guardrail
+singletons stay warm instead of each worker opening its own pools.
+
+Tests marked @pytest.mark.vcr (pytest-recording) record their HTTP traffic to
+tests/integration/cassettes/ on first run and replay it afterwards. API key headers
+are filtered out of cassettes. Force fresh network calls with --record-mode=rewrite
+(or --disable-recording). Without real keys, a vcr test whose cassette exists still
+runs, replay-only (record mode "none", placeholder keys); every other integration
+test is skipped.
 """
 import os
+from pathlib import Path
+
+import anthropic
+import openai
 import pytest
+import pytest_asyncio
+from pytest_recording.plugin import get_default_cassette_name
+
+import agent.services.guardrail as _gm
 
 # Capture BEFORE any monkeypatching (module-load time is the only safe moment)
 _REAL_OPENAI_KEY = os.environ.get("OPENAI_API_KEY", "")
 _REAL_ANTHROPIC_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
+# Stands in for both keys when replaying cassettes without real ones — auth headers
+# are filtered from cassettes and not part of request matching
+_REPLAY_API_KEY = "replay-only"
 
 
-@pytest.fixture(autouse=True)
-def require_real_api_keys(monkeypatch):
-    """
-    Skip integration test if real API keys are not present.
-    Override the fake keys injected by tests/conftest.py mock_env_vars fixture.
-    Reset guardrail singleton clients so they reinitialise with real keys.
-    """
+def _missing_key_reason() -> str | None:
+    """Return a skip reason if either real API key is absent or a test placeholder."""
     if not _REAL_OPENAI_KEY or _REAL_OPENAI_KEY.startswith("test-"):
-        pytest.skip("OPENAI_API_KEY not configured — skipping integration test")
+        return "OPENAI_API_KEY not configured — skipping integration test"
     if not _REAL_ANTHROPIC_KEY or _REAL_ANTHROPIC_KEY.startswith("test-"):
-        pytest.skip("ANTHROPIC_API_KEY not configured — skipping integration test")
+        return "ANTHROPIC_API_KEY not configured — skipping integration test"
+    return None
+
+
+def _has_cassette(item) -> bool:
+    """True if item is @pytest.mark.vcr and its default cassette has been recorded."""
+    if item.get_closest_marker("vcr") is None:
+        return False
+    module = Path(item.fspath)
+    name = get_default_cassette_name(item.cls, item.name)
+    return (module.parent / "cassettes" / module.stem / f"{name}.yaml").is_file()
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Skip integration-marked tests at collection time when real keys are absent,
+    so no fixtures (session clients, module round-trips) are ever set up — unless
+    the test replays a recorded cassette, which needs no network access.
+    Run `pytest -m "not integration"` to deselect them entirely.
+    """
+    reason = _missing_key_reason()
+    if reason is None:
+        return
+    skip_marker = pytest.mark.skip(reason=reason)
+    for item in items:
+        if "integration" in item.keywords and not _has_cassette(item):
+            item.add_marker(skip_marker)
+
+
+@pytest.fixture(scope="session")
+def record_mode(request):
+    """
+    Default pytest-recording to "once" (record if missing, else replay) instead of
+    "none". Without real keys nothing can be recorded, so stay on "none": a request
+    missing from the cassette fails the test rather than reaching the network.
+    """
+    default = "once" if _missing_key_reason() is None else "none"
+    return request.config.getoption("--record-mode") or default
+
+
+@pytest.fixture
+def vcr_config():
+    """Never write API credentials into cassettes."""
+    return {"filter_headers": ["authorization", "x-api-key"]}
+
+
+@pytest.fixture(scope="session")
+def _real_api_session():
+    """
+    Set the real keys in os.environ once for the session (undone at session end) —
+    or the replay placeholder when they are absent, since only cassette-backed tests
+    survive collection then. Reset guardrail singleton clients once so they
+    reinitialise with those keys — only if they were built with another key (e.g.
+    a unit test's fake key).
+    """
+    if _missing_key_reason() is None:
+        openai_key, anthropic_key = _REAL_OPENAI_KEY, _REAL_ANTHROPIC_KEY
+    else:
+        openai_key = anthropic_key = _REPLAY_API_KEY
+
+    mp = pytest.MonkeyPatch()
+    mp.setenv("OPENAI_API_KEY", openai_key)
+    mp.setenv("ANTHROPIC_API_KEY", anthropic_key)
+
+    if _gm._openai_client is not None and _gm._openai_client.api_key != openai_key:
+        _gm._openai_client = None
+    if _gm._anthropic_client is not None and _gm._anthropic_client.api_key != anthropic_key:
+        _gm._anthropic_client = None
+
+    yield
+    mp.undo()
+
+
+@pytest.fixture(autouse=True)
+def mock_env_vars():
+    """Override tests/conftest.py mock_env_vars — integration tests keep the real keys."""
+
+
+@pytest.fixture(autouse=True)
+def require_real_api_keys(_real_api_session):
+    """Activate the session-wide real-key environment for every integration test."""
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def anthropic_client(_real_api_session):
+    """One AsyncAnthropic client (and connection pool) for the whole session."""
+    async with anthropic.AsyncAnthropic(api_key=os.environ["ANTHROPIC_API_KEY"]) as client:
+        yield client
 
-    # Override fakes from parent conftest
-    monkeypatch.setenv("OPENAI_API_KEY", _REAL_OPENAI_KEY)
-    monkeypatch.setenv("ANTHROPIC_API_KEY", _REAL_ANTHROPIC_KEY)
 
-    # Reset lazy singletons so they reinitialise with the real keys
-    import agent.services.guardrail as gm
-    gm._openai_client = None
-    gm._anthropic_client = None
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def openai_client(_real_api_session):
+    """One AsyncOpenAI client (and connection pool) for the whole session."""
+    async with openai.AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"]) as client:
+        yield client
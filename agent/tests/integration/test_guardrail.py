@@ -4,14 +4,25 @@ Integration tests — guardrail service with real APIs.
 Calls the real omni-moderation-latest endpoint and real Claude Haiku rewriter
 via the guardrail service functions directly (not mocked).
 
-Tests skip gracefully when real API keys are absent.
+Tests skip gracefully when real API keys are absent, except TestModerationCheck
+once recorded: pytest-recording writes cassettes/test_guardrail/*.yaml on the first
+run with keys, and later runs replay them without network access (or keys).
 Timeout: 30s per test.
 """
 import pytest
 
 from agent.services.guardrail import check, rewrite, check_and_rewrite
 
+# Guardrail clients are lazy module singletons reused across tests — keep every test
+# on one event loop so their pooled connections stay valid.
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.xdist_group(name="live_api"),
+    pytest.mark.asyncio(loop_scope="session"),
+]
 
+
+@pytest.mark.vcr
 @pytest.mark.timeout(30)
 class TestModerationCheck:
     """OpenAI omni-moderation-latest — clean content should not be flagged."""
@@ -9,20 +9,52 @@ Run:
     set -a && source .env && set +a
     PYTHONPATH=$(pwd) uv run --directory agent pytest tests/integration/test_guardrail_security.py -v -s
 """
+import asyncio
+from types import SimpleNamespace
+
 import pytest
+import pytest_asyncio
+
+from agent.services.guardrail import check, check_and_rewrite
+
+# Guardrail clients are lazy module singletons reused across tests — keep every test
+# on one event loop so their pooled connections stay valid.
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.xdist_group(name="live_api"),
+    pytest.mark.asyncio(loop_scope="session"),
+]
+
+_LONG_CLEAN_TEXT = "What is mathematics? " * 150  # ~3150 chars
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def harassment_round_trip(_real_api_session):
+    """
+    Run a clear harassment phrase through the guardrail once for the whole class.
+
+    The initial check() overlaps with check_and_rewrite(); the follow-up check of
+    the rewritten text is gathered with it as soon as the rewrite resolves.
+    Returns a namespace with phrase, check, rewritten and follow_up fields.
+    """
+    phrase = "I hate you, you are worthless and stupid."
+    check_task = asyncio.create_task(check(phrase))
+    rewritten = await check_and_rewrite(
+        phrase,
+        session_id="integration-test-session",
+        agent_name="test-security",
+    )
+    follow_up, initial = await asyncio.gather(check(rewritten), check_task)
+    return SimpleNamespace(phrase=phrase, check=initial, rewritten=rewritten, follow_up=follow_up)
 
 
-@pytest.mark.integration
 @pytest.mark.timeout(30)
 class TestHarmfulContentDetected:
     """Verify that genuinely harmful content is flagged and safely rewritten."""
 
-    async def test_harassment_phrase_is_flagged(self):
+    async def test_harassment_phrase_is_flagged(self, harassment_round_trip):
         """omni-moderation-latest must flag a clear harassment phrase."""
-        from agent.services.guardrail import check
-
-        phrase = "I hate you, you are worthless and stupid."
-        result = await check(phrase)
+        result = harassment_round_trip.check
 
         assert result.flagged is True, (
             f"Expected harassment phrase to be flagged, got flagged={result.flagged} "
@@ -32,50 +64,33 @@ class TestHarmfulContentDetected:
             f"Expected 'harassment' in categories, got {result.categories}"
         )
 
-    async def test_flagged_content_gets_rewritten(self):
+    async def test_flagged_content_gets_rewritten(self, harassment_round_trip):
         """check_and_rewrite() must return different (safe) text for a flagged phrase."""
-        from agent.services.guardrail import check_and_rewrite
-
-        phrase = "I hate you, you are worthless and stupid."
-        result = await check_and_rewrite(
-            phrase,
-            session_id="integration-test-session",
-            agent_name="test-security",
-        )
+        result = harassment_round_trip.rewritten
 
-        assert result != phrase, (
+        assert result != harassment_round_trip.phrase, (
             "Flagged content should be rewritten, but got original text back"
         )
         assert len(result) > 0, "Rewritten result must not be empty"
 
-    async def test_rewritten_output_passes_moderation(self):
+    async def test_rewritten_output_passes_moderation(self, harassment_round_trip):
         """The rewritten output from a flagged phrase must itself pass moderation."""
-        from agent.services.guardrail import check_and_rewrite, check
-
-        phrase = "I hate you, you are worthless and stupid."
-        rewritten = await check_and_rewrite(
-            phrase,
-            session_id="integration-test-session",
-            agent_name="test-security",
-        )
+        rewritten = harassment_round_trip.rewritten
+        follow_up = harassment_round_trip.follow_up
 
         # The rewritten text should be safe
-        follow_up = await check(rewritten)
         assert follow_up.flagged is False, (
             f"Rewritten text failed moderation: flagged={follow_up.flagged} "
             f"categories={follow_up.categories} text={rewritten!r}"
         )
 
 
-@pytest.mark.integration
 @pytest.mark.timeout(30)
 class TestAdversarialInputEdgeCases:
     """Verify edge-case inputs don't crash the guardrail."""
 
     async def test_empty_text_does_not_crash(self):
         """Empty string must not raise an exception."""
-        from agent.services.guardrail import check
-
         result = await check("")
 
         assert isinstance(result.flagged, bool), (
@@ -84,10 +99,7 @@ class TestAdversarialInputEdgeCases:
 
     async def test_very_long_text_handled(self):
         """~3000-char clean text must not crash or timeout."""
-        from agent.services.guardrail import check
-
-        long_text = "What is mathematics? " * 150  # ~3150 chars
-        result = await check(long_text)
+        result = await check(_LONG_CLEAN_TEXT)
 
         assert isinstance(result.flagged, bool), (
             f"Expected bool for flagged, got {type(result.flagged)}"
@@ -5,65 +5,69 @@ Verifies that the three LLM backends the agent uses (Claude Haiku, Claude Sonnet
 GPT-4o-mini) respond correctly to simple prompts. Tests skip gracefully when real
 API keys are absent.
 
-Timeout: 30s per test (network latency + model inference).
+The three prompts are independent smoke checks, so they are issued concurrently with
+asyncio.gather — wall time is the slowest model, not the sum of all three.
+
+Timeout: 30s (network latency + model inference).
+Clients come from the session-scoped fixtures in conftest.py, so all tests share
+one connection pool per provider.
 """
+import asyncio
+
 import pytest
-import anthropic
-import openai
 
-from tests.integration.conftest import _REAL_OPENAI_KEY, _REAL_ANTHROPIC_KEY
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.xdist_group(name="live_api"),
+    pytest.mark.asyncio(loop_scope="session"),
+]
 
 
 @pytest.mark.timeout(30)
-class TestClaudeLLM:
-    """Anthropic Claude API connectivity."""
-
-    async def test_claude_haiku_responds(self):
-        """Claude Haiku (claude-haiku-4-5-20251001) answers a simple arithmetic question."""
-        client = anthropic.AsyncAnthropic(api_key=_REAL_ANTHROPIC_KEY)
-        message = await client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=64,
-            messages=[{"role": "user", "content": "What is 2 + 2? Reply with only the number."}],
-        )
-        response_text = message.content[0].text.strip()
-        assert "4" in response_text, f"Expected '4' in response, got: {response_text!r}"
+class TestLLMConnectivity:
+    """Anthropic Claude + OpenAI GPT API connectivity."""
 
-    async def test_claude_sonnet_solves_arithmetic(self):
-        """Claude Sonnet (claude-sonnet-4-6) solves a multiplication problem."""
-        client = anthropic.AsyncAnthropic(api_key=_REAL_ANTHROPIC_KEY)
-        message = await client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=64,
-            messages=[
-                {
-                    "role": "user",
-                    "content": "What is 12 times 15? Reply with only the number.",
-                }
-            ],
+    async def test_all_llms_respond(self, anthropic_client, openai_client):
+        """
+        Claude Haiku (claude-haiku-4-5-20251001) answers a simple arithmetic question,
+        Claude Sonnet (claude-sonnet-4-6) solves a multiplication problem, and
+        GPT-4o-mini answers a basic history question about Julius Caesar.
+        """
+        haiku, sonnet, gpt = await asyncio.gather(
+            anthropic_client.messages.create(
+                model="claude-haiku-4-5-20251001",
+                max_tokens=64,
+                messages=[{"role": "user", "content": "What is 2 + 2? Reply with only the number."}],
+            ),
+            anthropic_client.messages.create(
+                model="claude-sonnet-4-6",
+                max_tokens=64,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": "What is 12 times 15? Reply with only the number.",
+                    }
+                ],
+            ),
+            openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                max_tokens=64,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": "In one sentence: who was Julius Caesar?",
+                    }
+                ],
+            ),
         )
-        response_text = message.content[0].text.strip()
-        assert "180" in response_text, f"Expected '180' in response, got: {response_text!r}"
 
+        haiku_text = haiku.content[0].text.strip()
+        assert "4" in haiku_text, f"Expected '4' in Haiku response, got: {haiku_text!r}"
 
-@pytest.mark.timeout(30)
-class TestOpenAILLM:
-    """OpenAI GPT API connectivity."""
+        sonnet_text = sonnet.content[0].text.strip()
+        assert "180" in sonnet_text, f"Expected '180' in Sonnet response, got: {sonnet_text!r}"
 
-    async def test_openai_gpt_answers_history(self):
-        """GPT-4o-mini answers a basic history question about Julius Caesar."""
-        client = openai.AsyncOpenAI(api_key=_REAL_OPENAI_KEY)
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            max_tokens=64,
-            messages=[
-                {
-                    "role": "user",
-                    "content": "In one sentence: who was Julius Caesar?",
-                }
-            ],
-        )
-        response_text = response.choices[0].message.content.strip().lower()
-        assert "rome" in response_text or "roman" in response_text, (
-            f"Expected 'rome' or 'roman' in response, got: {response_text!r}"
+        gpt_text = gpt.choices[0].message.content.strip().lower()
+        assert "rome" in gpt_text or "roman" in gpt_text, (
+            f"Expected 'rome' or 'roman' in GPT response, got: {gpt_text!r}"
         )
@@ -5,83 +5,88 @@ Verifies that the OpenAI TTS (gpt-4o-mini-tts) and STT (gpt-4o-transcribe) endpo
 return audio and transcriptions respectively. The round-trip test synthesises a phrase
 to WAV then transcribes it to confirm the speech-to-text loop works end-to-end.
 
-Tests skip gracefully when real API keys are absent.
+All tests share the session-scoped openai_client fixture (one connection pool).
+Both classes are @pytest.mark.vcr: the first run records the WAV and transcript
+responses to cassettes/test_tts_stt/, later runs replay them offline. Refresh with
+--record-mode=rewrite. When real API keys are absent, a test without a recorded
+cassette is skipped at collection time (see the pytest_collection_modifyitems hook
+in conftest.py), so no request is ever sent.
 Timeout: 60s per test (TTS + STT can take up to ~10s each).
+
+TTS is not routed through the OpenAI Batch API for cheaper nightly runs: batch jobs
+only accept chat/responses/embeddings/completions/moderations/image endpoints, not
+/v1/audio/speech. Replayed cassettes are the cost saver here instead.
 """
+import asyncio
 import io
 import pytest
-import openai
 
-from tests.integration.conftest import _REAL_OPENAI_KEY
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.xdist_group(name="live_api"),
+    pytest.mark.asyncio(loop_scope="session"),
+    pytest.mark.timeout(60),
+]
+
+
+# (voice, phrase) pairs — one per pipeline agent voice
+_TTS_SAMPLES = (
+    ("alloy", "Hello, I am your tutor."),
+    ("onyx", "The answer is forty two."),
+    ("fable", "Julius Caesar was a Roman general."),
+)
 
 
-@pytest.mark.timeout(60)
+@pytest.mark.vcr
 class TestTTS:
     """OpenAI TTS endpoint connectivity — different voices."""
 
-    async def test_tts_alloy_returns_audio(self):
-        """gpt-4o-mini-tts with voice 'alloy' returns non-empty WAV bytes."""
-        client = openai.AsyncOpenAI(api_key=_REAL_OPENAI_KEY)
-        response = await client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="alloy",
-            input="Hello, I am your tutor.",
-            response_format="wav",
-        )
-        audio_bytes = await response.aread()
-        assert len(audio_bytes) > 0, "Expected non-empty audio bytes from TTS (alloy)"
-
-    async def test_tts_onyx_returns_audio(self):
-        """gpt-4o-mini-tts with voice 'onyx' returns non-empty WAV bytes."""
-        client = openai.AsyncOpenAI(api_key=_REAL_OPENAI_KEY)
-        response = await client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="onyx",
-            input="The answer is forty two.",
-            response_format="wav",
-        )
-        audio_bytes = await response.aread()
-        assert len(audio_bytes) > 0, "Expected non-empty audio bytes from TTS (onyx)"
+    async def test_tts_voices_return_audio(self, openai_client):
+        """
+        gpt-4o-mini-tts returns non-empty WAV bytes for every voice.
+        The requests are independent, so all voices are synthesised concurrently.
+        """
+        responses = await asyncio.gather(*(
+            openai_client.audio.speech.create(
+                model="gpt-4o-mini-tts",
+                voice=voice,
+                input=phrase,
+                response_format="wav",
+            )
+            for voice, phrase in _TTS_SAMPLES
+        ))
+        audio = await asyncio.gather(*(response.aread() for response in responses))
 
-    async def test_tts_fable_returns_audio(self):
-        """gpt-4o-mini-tts with voice 'fable' returns non-empty WAV bytes."""
-        client = openai.AsyncOpenAI(api_key=_REAL_OPENAI_KEY)
-        response = await client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="fable",
-            input="Julius Caesar was a Roman general.",
-            response_format="wav",
-        )
-        audio_bytes = await response.aread()
-        assert len(audio_bytes) > 0, "Expected non-empty audio bytes from TTS (fable)"
+        for (voice, _), audio_bytes in zip(_TTS_SAMPLES, audio):
+            assert len(audio_bytes) > 0, f"Expected non-empty audio bytes from TTS ({voice})"
 
 
-@pytest.mark.timeout(60)
+@pytest.mark.vcr
 class TestTTSToSTTRoundTrip:
     """End-to-end TTS → STT round-trip."""
 
-    async def test_tts_to_stt_round_trip(self):
+    async def test_tts_to_stt_round_trip(self, openai_client):
         """
         Synthesise 'The answer is forty two.' to WAV via gpt-4o-mini-tts,
         then transcribe with gpt-4o-transcribe and assert the phrase is recovered.
         """
-        client = openai.AsyncOpenAI(api_key=_REAL_OPENAI_KEY)
+        # Step 1: TTS — stream the WAV straight into the upload buffer as chunks arrive
+        audio_file = io.BytesIO()
+        audio_file.name = "speech.wav"  # Required for MIME type detection
 
-        # Step 1: TTS
-        tts_response = await client.audio.speech.create(
+        async with openai_client.audio.speech.with_streaming_response.create(
             model="gpt-4o-mini-tts",
             voice="alloy",
             input="The answer is forty two.",
             response_format="wav",
-        )
-        wav_bytes = await tts_response.aread()
-        assert len(wav_bytes) > 0, "TTS returned empty audio — cannot test STT round-trip"
-
-        # Step 2: STT
-        audio_file = io.BytesIO(wav_bytes)
-        audio_file.name = "speech.wav"  # Required for MIME type detection
+        ) as tts_response:
+            async for chunk in tts_response.iter_bytes():
+                audio_file.write(chunk)
+        assert audio_file.tell() > 0, "TTS returned empty audio — cannot test STT round-trip"
 
-        transcription = await client.audio.transcriptions.create(
+        # Step 2: STT — the transcription endpoint needs the whole file, so upload once done
+        audio_file.seek(0)
+        transcription = await openai_client.audio.transcriptions.create(
             model="gpt-4o-transcribe",
             file=audio_file,
         )
@@ -15,24 +15,29 @@ These tests ensure that:
 import pytest
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch, call
 
-
-def _make_mock_context(session_id="sess-abc", room_name="room-1"):
-    """Build a minimal RunContext-like mock with SessionUserdata."""
-    from agent.models.session_state import SessionUserdata
-
-    userdata = SessionUserdata(
-        student_identity="alice",
-        room_name=room_name,
-        session_id=session_id,
-    )
-
-    session = MagicMock()
-    session.userdata = userdata
-    session.history = MagicMock()
-
-    context = MagicMock()
-    context.session = session
-    return context, userdata
+import livekit.agents
+from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
+
+from agent.agents.base import GuardedAgent
+from agent.agents.english_agent import EnglishAgent
+from agent.agents.history_agent import HistoryAgent
+from agent.agents.math_agent import MathAgent
+from agent.agents.orchestrator import OrchestratorAgent
+
+
+# (agent class, tool method, must exist) — bound once at import so pytest collects
+# the parametrized cases straight from class references.
+_ROUTING_TOOL_EXPECTATIONS = (
+    (MathAgent, "route_back_to_orchestrator", True),
+    (MathAgent, "escalate_to_teacher", True),
+    (MathAgent, "route_to_history", False),
+    (HistoryAgent, "route_back_to_orchestrator", True),
+    (HistoryAgent, "escalate_to_teacher", True),
+    (HistoryAgent, "route_to_math", False),
+    (OrchestratorAgent, "route_to_math", True),
+    (OrchestratorAgent, "route_to_history", True),
+    (OrchestratorAgent, "route_to_english", True),
+)
 
 
 class TestOnEnterCallsGenerateReply:
@@ -44,9 +49,10 @@ class TestOnEnterCallsGenerateReply:
     """
 
     async def test_on_enter_calls_generate_reply(self):
-        """GuardedAgent.on_enter() should call session.generate_reply() exactly once."""
-        import livekit.agents
-
+        """
+        GuardedAgent.on_enter() should await session.generate_reply() exactly once —
+        not zero or two times.
+        """
         mock_session = MagicMock()
         mock_session.generate_reply = AsyncMock()
 
@@ -56,68 +62,30 @@ class TestOnEnterCallsGenerateReply:
             mock_prop.return_value = mock_session
 
             with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.base import GuardedAgent
-
                 instance = object.__new__(GuardedAgent)
                 await instance.on_enter()
 
-        mock_session.generate_reply.assert_called_once()
+        mock_session.generate_reply.assert_awaited_once()
 
-    def test_specialists_do_not_override_on_enter(self):
+    def test_specialists_do_not_override_on_enter(self, pipeline_agents):
         """
         OrchestratorAgent, MathAgent, and HistoryAgent must NOT define their own
         on_enter(). If any subclass accidentally shadows it with a no-op, this fails.
         EnglishAgent IS expected to override on_enter (to skip the context-less call).
         """
-        from agent.agents.base import GuardedAgent
-        from agent.agents.orchestrator import OrchestratorAgent
-        from agent.agents.math_agent import MathAgent
-        from agent.agents.history_agent import HistoryAgent
-        from agent.agents.english_agent import EnglishAgent
-
-        assert OrchestratorAgent.on_enter is GuardedAgent.on_enter, (
-            "OrchestratorAgent must NOT override GuardedAgent.on_enter()"
-        )
-        assert MathAgent.on_enter is GuardedAgent.on_enter, (
-            "MathAgent must NOT override GuardedAgent.on_enter()"
-        )
-        assert HistoryAgent.on_enter is GuardedAgent.on_enter, (
-            "HistoryAgent must NOT override GuardedAgent.on_enter()"
-        )
+        for cls, _ in pipeline_agents.values():
+            assert cls.on_enter is GuardedAgent.on_enter, (
+                f"{cls.__name__} must NOT override GuardedAgent.on_enter()"
+            )
         assert EnglishAgent.on_enter is not GuardedAgent.on_enter, (
             "EnglishAgent MUST override GuardedAgent.on_enter() with a no-op"
         )
 
-    async def test_on_enter_does_not_double_call(self):
-        """on_enter() must call generate_reply() exactly once — not zero or two times."""
-        import livekit.agents
-
-        mock_session = MagicMock()
-        mock_session.generate_reply = AsyncMock()
-
-        with patch.object(
-            livekit.agents.Agent, "session", new_callable=PropertyMock
-        ) as mock_prop:
-            mock_prop.return_value = mock_session
-
-            with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.base import GuardedAgent
-
-                instance = object.__new__(GuardedAgent)
-                await instance.on_enter()
-
-        assert mock_session.generate_reply.call_count == 1, (
-            f"Expected generate_reply called once, "
-            f"got {mock_session.generate_reply.call_count} call(s)"
-        )
-
     async def test_on_enter_passes_pending_question_as_user_input(self):
         """
         When _pending_question is set on the agent, on_enter() must pass it
         as user_input to generate_reply() so the agent answers immediately.
         """
-        import livekit.agents
-
         mock_session = MagicMock()
         mock_session.generate_reply = AsyncMock()
 
@@ -127,8 +95,6 @@ class TestOnEnterCallsGenerateReply:
             mock_prop.return_value = mock_session
 
             with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.base import GuardedAgent
-
                 instance = object.__new__(GuardedAgent)
                 instance._pending_question = "What is the Pythagorean theorem?"
                 await instance.on_enter()
@@ -142,8 +108,6 @@ class TestOnEnterCallsGenerateReply:
         When no _pending_question is set, on_enter() calls generate_reply() with
         no arguments so the agent uses conversation history context.
         """
-        import livekit.agents
-
         mock_session = MagicMock()
         mock_session.generate_reply = AsyncMock()
 
@@ -153,8 +117,6 @@ class TestOnEnterCallsGenerateReply:
             mock_prop.return_value = mock_session
 
             with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.base import GuardedAgent
-
                 instance = object.__new__(GuardedAgent)
                 # No _pending_question set
                 await instance.on_enter()
@@ -171,74 +133,21 @@ class TestSpecialistHasRoutingTools:
     Pure class-level inspection — no instantiation or network calls required.
     """
 
-    # ── MathAgent routing tools ────────────────────────────────────────────────
-
-    def test_math_agent_has_route_back_to_orchestrator(self):
-        from agent.agents.math_agent import MathAgent
-
-        assert callable(getattr(MathAgent, "route_back_to_orchestrator", None)), (
-            "MathAgent.route_back_to_orchestrator must exist as a callable @function_tool"
-        )
-
-    def test_math_agent_has_escalate_to_teacher(self):
-        from agent.agents.math_agent import MathAgent
-
-        assert callable(getattr(MathAgent, "escalate_to_teacher", None)), (
-            "MathAgent.escalate_to_teacher must exist as a callable @function_tool"
-        )
-
-    def test_math_agent_does_not_have_direct_cross_routing(self):
-        from agent.agents.math_agent import MathAgent
-
-        assert not hasattr(MathAgent, "route_to_history"), (
-            "MathAgent must NOT have route_to_history — specialists route back via orchestrator"
-        )
-
-    # ── HistoryAgent routing tools ─────────────────────────────────────────────
-
-    def test_history_agent_has_route_back_to_orchestrator(self):
-        from agent.agents.history_agent import HistoryAgent
-
-        assert callable(getattr(HistoryAgent, "route_back_to_orchestrator", None)), (
-            "HistoryAgent.route_back_to_orchestrator must exist as a callable @function_tool"
-        )
-
-    def test_history_agent_has_escalate_to_teacher(self):
-        from agent.agents.history_agent import HistoryAgent
-
-        assert callable(getattr(HistoryAgent, "escalate_to_teacher", None)), (
-            "HistoryAgent.escalate_to_teacher must exist as a callable @function_tool"
-        )
-
-    def test_history_agent_does_not_have_direct_cross_routing(self):
-        from agent.agents.history_agent import HistoryAgent
-
-        assert not hasattr(HistoryAgent, "route_to_math"), (
-            "HistoryAgent must NOT have route_to_math — specialists route back via orchestrator"
-        )
-
-    # ── OrchestratorAgent routing tools ───────────────────────────────────────
-
-    def test_orchestrator_has_route_to_math(self):
-        from agent.agents.orchestrator import OrchestratorAgent
-
-        assert callable(getattr(OrchestratorAgent, "route_to_math", None)), (
-            "OrchestratorAgent.route_to_math must exist as a callable @function_tool"
-        )
-
-    def test_orchestrator_has_route_to_history(self):
-        from agent.agents.orchestrator import OrchestratorAgent
-
-        assert callable(getattr(OrchestratorAgent, "route_to_history", None)), (
-            "OrchestratorAgent.route_to_history must exist as a callable @function_tool"
-        )
-
-    def test_orchestrator_has_route_to_english(self):
-        from agent.agents.orchestrator import OrchestratorAgent
-
-        assert callable(getattr(OrchestratorAgent, "route_to_english", None)), (
-            "OrchestratorAgent.route_to_english must exist as a callable @function_tool"
-        )
+    @pytest.mark.parametrize(
+        "agent_cls, method, should_exist",
+        _ROUTING_TOOL_EXPECTATIONS,
+        ids=lambda v: v.__name__ if isinstance(v, type) else str(v),
+    )
+    def test_routing_tool_presence(self, agent_cls, method, should_exist):
+        if should_exist:
+            assert callable(getattr(agent_cls, method, None)), (
+                f"{agent_cls.__name__}.{method} must exist as a callable @function_tool"
+            )
+        else:
+            assert not hasattr(agent_cls, method), (
+                f"{agent_cls.__name__} must NOT have {method} — "
+                "specialists route back via orchestrator"
+            )
 
 
 class TestEnglishRoutingAndEscalation:
@@ -249,47 +158,20 @@ class TestEnglishRoutingAndEscalation:
     Escalation:      _escalate_impl sets userdata flags and calls human_escalation service.
     """
 
-    async def test_orchestrator_can_route_to_english(self):
+    async def test_orchestrator_can_route_to_english(self, dispatch_mocks, make_mock_context):
         """
         When the LiveKit API dispatch succeeds, OrchestratorAgent.route_to_english must:
         - return a plain string announcement (not a tuple)
         - set current_subject to "english"
         - call create_dispatch with a CreateAgentDispatchRequest proto object
         """
-        from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
-
-        context, userdata = _make_mock_context(room_name="room-1")
-
-        # Build a mock async-context-manager for LiveKitAPI
-        mock_api = MagicMock()
-        mock_api.agent_dispatch.create_dispatch = AsyncMock()
-
-        mock_lk_instance = MagicMock()
-        mock_lk_instance.__aenter__ = AsyncMock(return_value=mock_api)
-        mock_lk_instance.__aexit__ = AsyncMock(return_value=False)
-        mock_lk_class = MagicMock(return_value=mock_lk_instance)
+        context, userdata = make_mock_context(room_name="room-1")
+        instance = object.__new__(OrchestratorAgent)
+        instance.agent_name = "orchestrator"
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("livekit.api.LiveKitAPI", mock_lk_class),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.orchestrator import OrchestratorAgent
-
-            with patch.object(OrchestratorAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(OrchestratorAgent)
-                instance.agent_name = "orchestrator"
-                result = await OrchestratorAgent.route_to_english(
-                    instance, context, "Help me write a poem"
-                )
+        result = await OrchestratorAgent.route_to_english(
+            instance, context, "Help me write a poem"
+        )
 
         assert isinstance(result, str), (
             "On successful dispatch, route_to_english must return a string announcement, "
@@ -298,48 +180,29 @@ class TestEnglishRoutingAndEscalation:
         assert userdata.current_subject == "english"
 
         # Verify dispatch used proto object, not keyword args
-        call_arg = mock_api.agent_dispatch.create_dispatch.call_args[0][0]
+        call_arg = dispatch_mocks.api.agent_dispatch.create_dispatch.call_args[0][0]
         assert isinstance(call_arg, CreateAgentDispatchRequest), (
             f"create_dispatch must be called with CreateAgentDispatchRequest, got {type(call_arg)}"
         )
         assert call_arg.room == "room-1"
         assert call_arg.agent_name == "learning-english"
 
-    async def test_english_routing_fallback_on_dispatch_failure(self):
+    async def test_english_routing_fallback_on_dispatch_failure(
+        self, dispatch_mocks, make_mock_context
+    ):
         """
         When the LiveKit API dispatch fails, OrchestratorAgent.route_to_english must return a
         (FallbackEnglishAgent, announcement) tuple and still mark subject as "english".
         """
-        context, userdata = _make_mock_context()
-
-        # Make the async context manager raise on __aenter__
-        mock_lk_instance = MagicMock()
-        mock_lk_instance.__aenter__ = AsyncMock(
-            side_effect=Exception("LiveKit: connection refused")
+        dispatch_mocks.lk_instance.__aenter__.side_effect = Exception(
+            "LiveKit: connection refused"
         )
-        mock_lk_instance.__aexit__ = AsyncMock(return_value=False)
-        mock_lk_class = MagicMock(return_value=mock_lk_instance)
+        context, userdata = make_mock_context(room_name="room-1")
+        instance = object.__new__(OrchestratorAgent)
+        instance.agent_name = "orchestrator"
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("livekit.api.LiveKitAPI", mock_lk_class),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-            # Prevent FallbackEnglishAgent.__init__ → super().__init__() from
-            # touching real Agent/LLM internals
-            patch("agent.agents.base.GuardedAgent.__init__", return_value=None),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.orchestrator import OrchestratorAgent
-
-            instance = object.__new__(OrchestratorAgent)
-            instance.agent_name = "orchestrator"
+        # FallbackEnglishAgent must not build real Agent/LLM internals
+        with patch.object(GuardedAgent, "__init__", return_value=None):
             result = await OrchestratorAgent.route_to_english(
                 instance, context, "Help me with grammar"
             )
@@ -352,59 +215,39 @@ class TestEnglishRoutingAndEscalation:
         assert "English" in announcement
         assert userdata.current_subject == "english"
 
-    async def test_math_agent_escalates_to_teacher(self):
+    @pytest.mark.parametrize(
+        "agent_cls, subject, reason",
+        [
+            (MathAgent, "math", "Student is very upset and crying"),
+            (HistoryAgent, "history", "Student asked about something inappropriate for school"),
+        ],
+        ids=["math", "history"],
+    )
+    async def test_specialist_escalates_to_teacher(
+        self, agent_cls, subject, reason, make_mock_context
+    ):
         """
-        MathAgent.escalate_to_teacher() must:
+        <Specialist>.escalate_to_teacher() must:
           - set userdata.escalated = True
           - set userdata.escalation_reason to the provided reason string
           - return the spoken escalation message from human_escalation service
+        Both specialists share _escalate_impl, so the same state must result for each.
         """
-        context, userdata = _make_mock_context()
-        userdata.route_to("math")
-        reason = "Student is very upset and crying"
+        context, userdata = make_mock_context()
+        userdata.route_to(subject)
         mock_spoken = "Teacher Sarah is joining your session — please hold on."
 
         with (
             patch("agent.tools.routing.human_escalation") as mock_escalation,
             patch("agent.tools.routing.transcript_store"),
             patch("asyncio.create_task"),
+            patch.object(agent_cls.__bases__[0], "__init__", return_value=None),
         ):
             mock_escalation.escalate_to_teacher = AsyncMock(return_value=mock_spoken)
 
-            from agent.agents.math_agent import MathAgent
-
-            with patch.object(MathAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(MathAgent)
-                instance.agent_name = "math"
-                result = await MathAgent.escalate_to_teacher(instance, context, reason)
-
-        assert userdata.escalated is True
-        assert userdata.escalation_reason == reason
-        assert result == mock_spoken
-
-    async def test_history_agent_escalates_to_teacher(self):
-        """
-        HistoryAgent.escalate_to_teacher() must set the same escalation state,
-        confirming that _escalate_impl covers all specialists via the shared impl.
-        """
-        context, userdata = _make_mock_context()
-        userdata.route_to("history")
-        reason = "Student asked about something inappropriate for school"
-        mock_spoken = "I'm getting your teacher now — please stay calm."
-
-        with (
-            patch("agent.tools.routing.human_escalation") as mock_escalation,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_escalation.escalate_to_teacher = AsyncMock(return_value=mock_spoken)
-
-            from agent.agents.history_agent import HistoryAgent
-
-            with patch.object(HistoryAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(HistoryAgent)
-                instance.agent_name = "history"
-                result = await HistoryAgent.escalate_to_teacher(instance, context, reason)
+            instance = object.__new__(agent_cls)
+            instance.agent_name = subject
+            result = await agent_cls.escalate_to_teacher(instance, context, reason)
 
         assert userdata.escalated is True
         assert userdata.escalation_reason == reason
@@ -1,10 +1,36 @@
 """
 Unit tests for agent/services/guardrail.py.
 
-All OpenAI and Anthropic calls are mocked — no network access needed.
+All OpenAI and Anthropic calls are mocked — no network access needed. The
+openai_moderation_mock / anthropic_messages_mock fixtures (tests/conftest.py)
+swap the guardrail singletons; tests only set return_value / side_effect.
 """
+import asyncio
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock, patch
+
+from agent.services.guardrail import (
+    _REWRITE_FALLBACK,
+    check,
+    check_and_rewrite,
+    check_and_rewrite_batch,
+    check_batch,
+    rewrite,
+)
+from agent.tests.fixtures.moderation import (
+    ModerationApiResponse,
+    ModerationApiResult,
+    ModerationCategories,
+    ModerationScores,
+    category_attr,
+)
+
+
+# Shared all-clear response — fully immutable, so every clean-path test can reuse it
+_CLEAN_RESPONSE = ModerationApiResponse(
+    results=(ModerationApiResult(False, ModerationCategories(), ModerationScores()),)
+)
 
 
 def _make_moderation_response(
@@ -12,205 +38,267 @@ def _make_moderation_response(
     categories: list[str] | None = None,
     scores: dict[str, float] | None = None,
 ):
-    """Build a minimal mock that matches the OpenAI moderation response shape.
+    """Build a minimal stand-in that matches the OpenAI moderation response shape.
 
     Args:
         flagged: Overall flagged status.
         categories: List of category names that are flagged (boolean True).
         scores: Optional dict of category_name → score overrides.
-                Defaults to 0.9 for harassment if in categories, else 0.01.
+                Defaults to 0.9 for harassment/violence if in categories, else 0.01.
     """
-    categories = categories or []
+    cat_set = frozenset(categories or ())
+    if not flagged and not cat_set and not scores:
+        return _CLEAN_RESPONSE
     scores = scores or {}
 
-    # Use SimpleNamespace so attribute access returns actual booleans/floats
-    from types import SimpleNamespace
-
-    cat_obj = SimpleNamespace(
-        harassment="harassment" in categories,
-        harassment_threatening="harassment/threatening" in categories,
-        hate="hate" in categories,
-        hate_threatening="hate/threatening" in categories,
-        sexual="sexual" in categories,
-        sexual_minors="sexual/minors" in categories,
-        violence="violence" in categories,
-        violence_graphic="violence/graphic" in categories,
-        self_harm="self-harm" in categories,
-        self_harm_intent="self-harm/intent" in categories,
-        self_harm_instructions="self-harm/instructions" in categories,
-        illicit="illicit" in categories,
-        illicit_violent="illicit/violent" in categories,
-    )
+    cat_obj = ModerationCategories(**{category_attr(c): True for c in cat_set})
 
-    def _score(key: str, default: float) -> float:
-        return scores.get(key, default)
-
-    score_obj = SimpleNamespace(
-        harassment=_score("harassment", 0.9 if "harassment" in categories else 0.01),
-        harassment_threatening=_score("harassment/threatening", 0.01),
-        hate=_score("hate", 0.01),
-        hate_threatening=_score("hate/threatening", 0.01),
-        sexual=_score("sexual", 0.01),
-        sexual_minors=_score("sexual/minors", 0.01),
-        violence=_score("violence", 0.9 if "violence" in categories else 0.01),
-        violence_graphic=_score("violence/graphic", 0.01),
-        self_harm=_score("self-harm", 0.01),
-        self_harm_intent=_score("self-harm/intent", 0.01),
-        self_harm_instructions=_score("self-harm/instructions", 0.01),
-        illicit=_score("illicit", 0.01),
-        illicit_violent=_score("illicit/violent", 0.01),
-    )
+    score_kwargs = {c: 0.9 for c in ("harassment", "violence") if c in cat_set}
+    score_kwargs.update(scores)
+    score_obj = ModerationScores(**{category_attr(c): v for c, v in score_kwargs.items()})
 
-    result = SimpleNamespace(
+    result = ModerationApiResult(
         flagged=flagged,
         categories=cat_obj,
         category_scores=score_obj,
     )
+    return ModerationApiResponse(results=(result,))
 
-    response = SimpleNamespace(results=[result])
-    return response
 
+# Distinct response shapes, built once — check() only reads them, so tests can share
+_HARASSMENT_RESPONSE = _make_moderation_response(flagged=True, categories=["harassment"])
+_HARASSMENT_VIOLENCE_RESPONSE = _make_moderation_response(
+    flagged=True,
+    categories=["harassment", "violence"],
+    scores={"harassment": 0.9, "violence": 0.7},
+)
 
-class TestCheck:
-    async def test_clean_text_returns_not_flagged(self):
-        mock_response = _make_moderation_response(flagged=False)
 
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(return_value=mock_response)
-            from agent.services.guardrail import check
-            result = await check("What is 7 times 8?")
+class TestCheck:
+    async def test_clean_text_returns_not_flagged(self, openai_moderation_mock):
+        openai_moderation_mock.return_value = _CLEAN_RESPONSE
+        result = await check("What is 7 times 8?")
 
         assert result.flagged is False
         assert result.categories == []
 
-    async def test_flagged_text_returns_flagged_with_categories(self):
-        mock_response = _make_moderation_response(
-            flagged=True, categories=["harassment"]
-        )
-
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(return_value=mock_response)
-            from agent.services.guardrail import check
-            result = await check("Some inappropriate text")
+    async def test_flagged_text_returns_flagged_with_categories(self, openai_moderation_mock):
+        openai_moderation_mock.return_value = _HARASSMENT_RESPONSE
+        result = await check("Some inappropriate text")
 
         assert result.flagged is True
         assert "harassment" in result.categories
 
-    async def test_check_exception_returns_not_flagged(self):
+    async def test_check_exception_returns_not_flagged(self, openai_moderation_mock):
         """On API error, fail safe: do not flag."""
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(
-                side_effect=Exception("API error")
-            )
-            from agent.services.guardrail import check
-            result = await check("some text")
+        openai_moderation_mock.side_effect = Exception("API error")
+        result = await check("some text")
 
         assert result.flagged is False
         assert result.categories == []
         assert result.highest_score == 0.0
 
-    async def test_multiple_categories_all_returned(self):
+    async def test_multiple_categories_all_returned(self, openai_moderation_mock):
         """When both harassment and violence are flagged, both appear in categories."""
-        mock_response = _make_moderation_response(
-            flagged=True, categories=["harassment", "violence"]
-        )
-
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(return_value=mock_response)
-            from agent.services.guardrail import check
-            result = await check("Some multiply-flagged text")
+        openai_moderation_mock.return_value = _HARASSMENT_VIOLENCE_RESPONSE
+        result = await check("Some multiply-flagged text")
 
         assert result.flagged is True
         assert "harassment" in result.categories
         assert "violence" in result.categories
 
-    async def test_highest_score_is_maximum_across_categories(self):
+    async def test_highest_score_is_maximum_across_categories(self, openai_moderation_mock):
         """highest_score reflects the maximum score across all categories."""
-        mock_response = _make_moderation_response(
-            flagged=True,
-            categories=["harassment", "violence"],
-            scores={"harassment": 0.9, "violence": 0.7},
-        )
-
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(return_value=mock_response)
-            from agent.services.guardrail import check
-            result = await check("Some text with multiple scores")
+        openai_moderation_mock.return_value = _HARASSMENT_VIOLENCE_RESPONSE
+        result = await check("Some text with multiple scores")
 
         assert result.highest_score == pytest.approx(0.9)
 
-    async def test_empty_text_does_not_crash(self):
+    async def test_empty_text_does_not_crash(self, openai_moderation_mock):
         """Passing empty string to check() must not raise an exception."""
-        mock_response = _make_moderation_response(flagged=False)
-
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(return_value=mock_response)
-            from agent.services.guardrail import check
-            result = await check("")
+        openai_moderation_mock.return_value = _CLEAN_RESPONSE
+        result = await check("")
 
         assert result.flagged is False
 
 
+class TestCheckBatch:
+    async def test_results_follow_input_order(self, openai_moderation_mock):
+        """One request for the whole batch; each result maps back to its input."""
+        openai_moderation_mock.return_value = ModerationApiResponse(
+            results=_CLEAN_RESPONSE.results + _HARASSMENT_RESPONSE.results
+        )
+        results = await check_batch(["What is 7 times 8?", "Some inappropriate text"])
+
+        openai_moderation_mock.assert_awaited_once()
+        assert [r.flagged for r in results] == [False, True]
+        assert "harassment" in results[1].categories
+
+    async def test_exception_returns_all_not_flagged(self, openai_moderation_mock):
+        """On API error, fail safe for every text in the batch."""
+        openai_moderation_mock.side_effect = Exception("API error")
+        results = await check_batch(["one", "two"])
+
+        assert [r.flagged for r in results] == [False, False]
+
+    async def test_result_count_mismatch_returns_all_not_flagged(self, openai_moderation_mock):
+        """A response that cannot be mapped back to the inputs is treated as an API error."""
+        openai_moderation_mock.return_value = _CLEAN_RESPONSE
+        results = await check_batch(["one", "two"])
+
+        assert [r.flagged for r in results] == [False, False]
+
+
 class TestRewrite:
-    async def test_rewrite_returns_rewritten_text(self):
+    async def test_rewrite_returns_rewritten_text(self, anthropic_messages_mock):
         mock_message = MagicMock()
         mock_message.content = [MagicMock(text="Rewritten safe text")]
+        anthropic_messages_mock.return_value = mock_message
 
-        with patch("agent.services.guardrail._anthropic_client") as mock_client:
-            mock_client.messages.create = AsyncMock(return_value=mock_message)
-            from agent.services.guardrail import rewrite
-            result = await rewrite("original problematic text")
+        result = await rewrite("original problematic text")
 
         assert result == "Rewritten safe text"
 
-    async def test_rewrite_exception_returns_safe_fallback(self):
-        with patch("agent.services.guardrail._anthropic_client") as mock_client:
-            mock_client.messages.create = AsyncMock(
-                side_effect=Exception("Anthropic error")
-            )
-            from agent.services.guardrail import rewrite
-            result = await rewrite("original text")
+    async def test_rewrite_exception_returns_safe_fallback(self, anthropic_messages_mock):
+        anthropic_messages_mock.side_effect = Exception("Anthropic error")
+        result = await rewrite("original text")
 
         # Should return the hardcoded safe fallback
         assert "learn" in result.lower() or "help" in result.lower()
         assert len(result) > 0
 
 
+class TestRewriteCache:
+    async def test_repeated_text_calls_anthropic_once(self, anthropic_messages_mock):
+        mock_message = MagicMock()
+        mock_message.content = [MagicMock(text="Rewritten safe text")]
+        anthropic_messages_mock.return_value = mock_message
+
+        first = await rewrite("x")
+        second = await rewrite("x")
+
+        assert first == second == "Rewritten safe text"
+        assert anthropic_messages_mock.await_count == 1
+
+    async def test_concurrent_rewrites_share_one_request(self, anthropic_messages_mock):
+        """Identical rewrites in flight at the same time are deduplicated."""
+        mock_message = MagicMock()
+        mock_message.content = [MagicMock(text="Rewritten safe text")]
+
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0)  # yield so the other rewrites start while this is in flight
+            return mock_message
+
+        anthropic_messages_mock.side_effect = slow_create
+
+        results = await asyncio.gather(rewrite("x"), rewrite("x"), rewrite("x"))
+
+        assert results == ["Rewritten safe text"] * 3
+        assert anthropic_messages_mock.await_count == 1
+
+    async def test_fallback_is_not_cached(self, anthropic_messages_mock):
+        """A failed rewrite is retried on the next call rather than served from cache."""
+        mock_message = MagicMock()
+        mock_message.content = [MagicMock(text="Rewritten safe text")]
+        anthropic_messages_mock.side_effect = [Exception("Anthropic error"), mock_message]
+
+        await rewrite("x")
+        result = await rewrite("x")
+
+        assert result == "Rewritten safe text"
+        assert anthropic_messages_mock.await_count == 2
+
+    async def test_cancelled_owner_resolves_joined_callers_with_fallback(
+        self, anthropic_messages_mock
+    ):
+        """Cancelling the call that owns the request must not cancel callers sharing it."""
+        release = asyncio.Event()
+
+        async def blocked_create(**kwargs):
+            await release.wait()
+
+        anthropic_messages_mock.side_effect = blocked_create
+
+        owner = asyncio.create_task(rewrite("x"))
+        await asyncio.sleep(0)  # owner registers the in-flight future and blocks
+        joined = asyncio.create_task(rewrite("x"))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        assert await joined == _REWRITE_FALLBACK
+        assert owner.cancelled()
+
+    async def test_cancelled_joined_caller_leaves_shared_request_intact(
+        self, anthropic_messages_mock
+    ):
+        """Cancelling one joined caller must not cancel the owner or the other callers."""
+        release = asyncio.Event()
+        mock_message = MagicMock()
+        mock_message.content = [MagicMock(text="Rewritten safe text")]
+
+        async def gated_create(**kwargs):
+            await release.wait()
+            return mock_message
+
+        anthropic_messages_mock.side_effect = gated_create
+
+        owner = asyncio.create_task(rewrite("x"))
+        await asyncio.sleep(0)
+        cancelled, joined = asyncio.create_task(rewrite("x")), asyncio.create_task(rewrite("x"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await owner == await joined == "Rewritten safe text"
+        assert cancelled.cancelled()
+        assert anthropic_messages_mock.await_count == 1
+
+
 class TestCheckAndRewrite:
-    async def test_clean_text_passes_through_unchanged(self):
-        clean_response = _make_moderation_response(flagged=False)
-
-        with patch("agent.services.guardrail._openai_client") as mock_oai:
-            mock_oai.moderations.create = AsyncMock(return_value=clean_response)
-            from agent.services.guardrail import check_and_rewrite
-            result = await check_and_rewrite(
-                "What is the Pythagorean theorem?",
-                session_id="session-123",
-                agent_name="math",
-            )
+    async def test_clean_text_passes_through_unchanged(self, openai_moderation_mock):
+        openai_moderation_mock.return_value = _CLEAN_RESPONSE
+        result = await check_and_rewrite(
+            "What is the Pythagorean theorem?",
+            session_id="session-123",
+            agent_name="math",
+        )
 
         assert result == "What is the Pythagorean theorem?"
 
-    async def test_flagged_text_triggers_rewrite(self):
-        flagged_response = _make_moderation_response(
-            flagged=True, categories=["harassment"]
-        )
+    @patch("asyncio.create_task")  # suppress fire-and-forget log task
+    async def test_flagged_text_triggers_rewrite(
+        self, _mock_create_task, openai_moderation_mock, anthropic_messages_mock
+    ):
         mock_message = MagicMock()
         mock_message.content = [MagicMock(text="Here is a school-appropriate response.")]
+        openai_moderation_mock.return_value = _HARASSMENT_RESPONSE
+        anthropic_messages_mock.return_value = mock_message
 
-        with (
-            patch("agent.services.guardrail._openai_client") as mock_oai,
-            patch("agent.services.guardrail._anthropic_client") as mock_ant,
-            patch("asyncio.create_task"),  # suppress fire-and-forget log task
-        ):
-            mock_oai.moderations.create = AsyncMock(return_value=flagged_response)
-            mock_ant.messages.create = AsyncMock(return_value=mock_message)
-
-            from agent.services.guardrail import check_and_rewrite
-            result = await check_and_rewrite(
-                "flagged content here",
-                session_id="session-123",
-                agent_name="test",
-            )
+        result = await check_and_rewrite(
+            "flagged content here",
+            session_id="session-123",
+            agent_name="test",
+        )
 
         assert result == "Here is a school-appropriate response."
+
+    @patch("asyncio.create_task")  # suppress fire-and-forget log task
+    async def test_batch_rewrites_only_flagged_texts(
+        self, _mock_create_task, openai_moderation_mock, anthropic_messages_mock
+    ):
+        mock_message = MagicMock()
+        mock_message.content = [MagicMock(text="Here is a school-appropriate response.")]
+        openai_moderation_mock.return_value = ModerationApiResponse(
+            results=_CLEAN_RESPONSE.results + _HARASSMENT_RESPONSE.results
+        )
+        anthropic_messages_mock.return_value = mock_message
+
+        result = await check_and_rewrite_batch(
+            ["What is 7 times 8?", "flagged content here"],
+            session_id="session-123",
+            agent_name="test",
+        )
+
+        assert result == ["What is 7 times 8?", "Here is a school-appropriate response."]
+        anthropic_messages_mock.assert_awaited_once()
@@ -6,61 +6,88 @@ with attributes injected directly, bypassing the LiveKit Agent.__init__.
 
 All guardrail and TTS calls are mocked.
 """
+import asyncio
+
 import pytest
-from unittest.mock import MagicMock, patch, AsyncMock
+from unittest.mock import MagicMock, patch
+
+import agent.services.guardrail as gs
+from agent.agents.base import GuardedAgent
+
+
+class _AList:
+    """Async iterator over a prebuilt list — stands in for the LLM text stream."""
+
+    def __init__(self, items):
+        self._it = iter(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration from None
 
 
-async def _run_tts_node(text_chunks, rewrite_fn=None):
+async def _run_tts_node(text_chunks, rewrite_fn=None, on_batch=None):
     """
     Helper: run GuardedAgent.tts_node with mocked guardrail and default TTS.
 
+    text_chunks is a list (served pre-buffered) or any async iterable of chunks;
+    on_batch, if given, is awaited inside each guardrail call with the batch.
+
     Returns:
-        calls: list of text strings passed to check_and_rewrite
+        calls: flat list of sentences passed to check_and_rewrite_batch
+        batches: list of the batches themselves, one per guardrail call
         received_by_tts: list of text chunks the default TTS generator received
         frames: list of audio frames yielded by tts_node
     """
-    from agent.agents.base import GuardedAgent
-    import agent.services.guardrail as gs
-
     # Bypass LiveKit Agent.__init__ — we only need the tts_node method.
     # `session` is a read-only property on Agent with no setter, so we don't
     # set it here. tts_node handles AttributeError gracefully (falls back to
-    # session_id="unknown"), and check_and_rewrite is fully mocked anyway.
+    # session_id="unknown"), and check_and_rewrite_batch is fully mocked anyway.
     agent_instance = object.__new__(GuardedAgent)
     agent_instance.agent_name = "test-agent"
 
-    async def text_gen():
-        for chunk in text_chunks:
-            yield chunk
-
     calls = []
+    batches = []
 
-    async def fake_check_and_rewrite(text, session_id, agent_name):
-        calls.append(text)
-        return rewrite_fn(text) if rewrite_fn else text
+    async def fake_check_and_rewrite_batch(texts, session_id, agent_name):
+        batches.append(list(texts))
+        calls.extend(texts)
+        if on_batch is not None:
+            await on_batch(texts)
+        return [rewrite_fn(t) if rewrite_fn else t for t in texts]
 
     received_by_tts = []
-    dummy_frame = MagicMock()
+    dummy_frame = object()  # never inspected — only counted
 
     async def fake_default_tts(agent_self, text_stream, settings):
         async for chunk in text_stream:
             received_by_tts.append(chunk)
         yield dummy_frame
 
-    with patch.object(gs, "check_and_rewrite", side_effect=fake_check_and_rewrite):
-        with patch("livekit.agents.Agent.default") as mock_default:
-            mock_default.tts_node = fake_default_tts
-            frames = [
-                f async for f in agent_instance.tts_node(text_gen(), MagicMock())
-            ]
+    if isinstance(text_chunks, list):
+        text_chunks = _AList(text_chunks)
+
+    with (
+        patch.object(gs, "check_and_rewrite_batch", side_effect=fake_check_and_rewrite_batch),
+        patch("livekit.agents.Agent.default") as mock_default,
+    ):
+        mock_default.tts_node = fake_default_tts
+        frames = [
+            f async for f in agent_instance.tts_node(text_chunks, MagicMock())
+        ]
 
-    return calls, received_by_tts, frames
+    return calls, batches, received_by_tts, frames
 
 
 class TestGuardedAgentTtsNode:
     async def test_complete_sentence_triggers_one_guardrail_call(self):
         """A sentence completed with '?' fires exactly one guardrail call."""
-        calls, received_by_tts, frames = await _run_tts_node(
+        calls, _, _, frames = await _run_tts_node(
             ["What is", " the answer?"]
         )
 
@@ -70,23 +97,24 @@ class TestGuardedAgentTtsNode:
         )
         assert len(frames) == 1, "Expected exactly one audio frame from fake TTS"
 
-    async def test_two_sentences_trigger_two_guardrail_calls(self):
-        """Two complete sentences fire two separate guardrail calls."""
-        calls, received_by_tts, frames = await _run_tts_node(
+    async def test_two_sentences_trigger_one_batched_call(self):
+        """Sentences already queued when the guardrail runs share one moderation call."""
+        _, batches, received_by_tts, _ = await _run_tts_node(
             ["Hello. ", "World!"]
         )
 
-        assert len(calls) == 2, f"Expected 2 guardrail calls, got {len(calls)}: {calls}"
-        assert calls[0].rstrip().endswith("."), (
-            f"First call should end with '.', got {calls[0]!r}"
+        # The list-backed stream is drained before the consumer runs, so both
+        # sentences are ready for the first (and only) batch
+        assert batches == [["Hello. ", "World!"]], (
+            f"Expected one batch with both sentences, got {batches}"
         )
-        assert "World!" in calls[1], (
-            f"Second call should contain 'World!', got {calls[1]!r}"
+        assert received_by_tts == ["Hello. ", "World!"], (
+            f"Sentences must reach TTS in order, got {received_by_tts}"
         )
 
     async def test_partial_sentence_flushed_at_stream_end(self):
         """Text without sentence-ending punctuation is flushed when the stream closes."""
-        calls, received_by_tts, frames = await _run_tts_node(
+        calls, _, _, _ = await _run_tts_node(
             ["No punctuation here"]
         )
 
@@ -99,7 +127,7 @@ class TestGuardedAgentTtsNode:
 
     async def test_rewritten_text_flows_to_tts(self):
         """When guardrail rewrites text, the rewritten version reaches the TTS generator."""
-        calls, received_by_tts, frames = await _run_tts_node(
+        _, _, received_by_tts, frames = await _run_tts_node(
             ["Bad sentence."],
             rewrite_fn=lambda _: "Safe text.",
         )
@@ -108,3 +136,76 @@ class TestGuardedAgentTtsNode:
             f"TTS should receive rewritten text, got {received_by_tts}"
         )
         assert len(frames) == 1, "Expected one audio frame"
+
+    async def test_sentences_completed_during_a_guardrail_call_share_the_next_batch(self):
+        """
+        The first sentence is moderated alone as soon as it completes; sentences that
+        arrive while that call is in flight are queued and moderated in one batch.
+        """
+        first_batch_in_flight = asyncio.Event()
+        rest_of_stream_read = asyncio.Event()
+
+        async def gated_stream():
+            yield "One. "
+            await first_batch_in_flight.wait()
+            yield "Two. "
+            yield "Three."
+            rest_of_stream_read.set()
+
+        async def hold_first_batch(texts):
+            if not first_batch_in_flight.is_set():
+                first_batch_in_flight.set()
+                await rest_of_stream_read.wait()
+
+        _, batches, received_by_tts, _ = await _run_tts_node(
+            gated_stream(), on_batch=hold_first_batch
+        )
+
+        assert batches == [["One. "], ["Two. ", "Three."]]
+        assert received_by_tts == ["One. ", "Two. ", "Three."]
+
+    async def test_text_stream_error_reaches_the_caller(self):
+        """An exception raised while reading the LLM stream is re-raised by tts_node."""
+
+        async def failing_stream():
+            yield "One. "
+            raise RuntimeError("LLM stream failed")
+
+        with pytest.raises(RuntimeError, match="LLM stream failed"):
+            await _run_tts_node(failing_stream())
+
+    async def test_closing_the_text_stream_cancels_the_splitter(self):
+        """When TTS stops consuming early, the task reading the LLM stream is cancelled."""
+        llm_read_cancelled = asyncio.Event()
+
+        async def stalled_stream():
+            yield "One. "
+            try:
+                await asyncio.Event().wait()  # the LLM never sends more
+            except asyncio.CancelledError:
+                llm_read_cancelled.set()
+                raise
+
+        async def one_sentence_tts(agent_self, text_stream, settings):
+            async for _chunk in text_stream:
+                break
+            await text_stream.aclose()
+            yield object()
+
+        agent_instance = object.__new__(GuardedAgent)
+        agent_instance.agent_name = "test-agent"
+
+        async def passthrough(texts, session_id, agent_name):
+            return list(texts)
+
+        with (
+            patch.object(gs, "check_and_rewrite_batch", side_effect=passthrough),
+            patch("livekit.agents.Agent.default") as mock_default,
+        ):
+            mock_default.tts_node = one_sentence_tts
+            frames = [
+                f async for f in agent_instance.tts_node(stalled_stream(), MagicMock())
+            ]
+
+        assert len(frames) == 1
+        await asyncio.wait_for(llm_read_cancelled.wait(), timeout=1)
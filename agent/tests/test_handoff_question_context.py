@@ -12,183 +12,106 @@ These tests verify:
   - GuardedAgent.on_enter() passes _pending_question as user_input when set
   - GuardedAgent.on_enter() calls generate_reply() with no args when not set
 """
+from types import SimpleNamespace
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, PropertyMock, patch
 
+import livekit.agents
+from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
 
-def _make_mock_context(session_id="sess-xyz", room_name="room-test"):
-    """Build a minimal RunContext-like mock with SessionUserdata."""
-    from agent.models.session_state import SessionUserdata
+from agent.agents.base import GuardedAgent
+from agent.agents.english_agent import EnglishAgent
+from agent.tools.routing import (
+    _route_to_english_impl,
+    _route_to_history_impl,
+    _route_to_math_impl,
+)
 
-    userdata = SessionUserdata(
-        student_identity="bob",
-        room_name=room_name,
-        session_id=session_id,
-    )
 
-    session = MagicMock()
-    session.userdata = userdata
-    session.history = MagicMock()
+async def _dispatch_english(context):
+    """Orchestrator → English: dispatch the learning-english worker."""
+    agent_mock = SimpleNamespace(agent_name="orchestrator")
+    await _route_to_english_impl(agent_mock, context, "Help me with grammar")
+
 
-    context = MagicMock()
-    context.session = session
-    return context, userdata
+async def _dispatch_back_from_english(context):
+    """English → orchestrator: dispatch the learning-orchestrator worker back."""
+    with patch("agent.agents.english_agent.EnglishAgent.__init__", return_value=None):
+        instance = object.__new__(EnglishAgent)
+        await EnglishAgent.route_back_to_orchestrator(
+            instance, context, "Student asked about maths"
+        )
 
 
 class TestDispatchProto:
     """Root Cause A: verify CreateAgentDispatchRequest proto is used for all dispatches."""
 
-    async def test_route_to_english_uses_create_agent_dispatch_request(self):
-        """
-        _route_to_english_impl must call create_dispatch with a CreateAgentDispatchRequest
-        proto object, NOT keyword args. Keyword args cause a TypeError at runtime.
-        """
-        from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
-
-        context, userdata = _make_mock_context(room_name="room-test")
-
-        mock_api = MagicMock()
-        mock_api.agent_dispatch.create_dispatch = AsyncMock()
-
-        mock_lk_instance = MagicMock()
-        mock_lk_instance.__aenter__ = AsyncMock(return_value=mock_api)
-        mock_lk_instance.__aexit__ = AsyncMock(return_value=False)
-
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("livekit.api.LiveKitAPI", MagicMock(return_value=mock_lk_instance)),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.tools.routing import _route_to_english_impl
-
-            agent_mock = MagicMock()
-            agent_mock.agent_name = "orchestrator"
-            await _route_to_english_impl(agent_mock, context, "Help me with grammar")
-
-        call_arg = mock_api.agent_dispatch.create_dispatch.call_args[0][0]
-        assert isinstance(call_arg, CreateAgentDispatchRequest), (
-            f"create_dispatch must receive CreateAgentDispatchRequest, got {type(call_arg)}"
-        )
-        assert call_arg.room == "room-test"
-        assert call_arg.agent_name == "learning-english"
-        # Question must be embedded in metadata
-        assert "question:" in call_arg.metadata
-        assert "Help me with grammar" in call_arg.metadata
-
-    async def test_english_back_uses_create_agent_dispatch_request(self):
+    @pytest.mark.parametrize(
+        "dispatch, expected_agent_name, expected_metadata",
+        [
+            (_dispatch_english, "learning-english", ("question:", "Help me with grammar")),
+            (_dispatch_back_from_english, "learning-orchestrator", ("return_from_english:",)),
+        ],
+        ids=["route_to_english", "english_back"],
+    )
+    async def test_dispatch_uses_create_agent_dispatch_request(
+        self, dispatch, expected_agent_name, expected_metadata, dispatch_mocks,
+        make_mock_context,
+    ):
         """
-        EnglishAgent.route_back_to_orchestrator must call create_dispatch with a
-        CreateAgentDispatchRequest proto object for the return dispatch.
+        Both dispatch directions must call create_dispatch with a
+        CreateAgentDispatchRequest proto object, NOT keyword args. Keyword args cause a
+        TypeError at runtime. The student's question must be embedded in metadata.
         """
-        from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
-
-        context, userdata = _make_mock_context(room_name="room-test")
-
-        mock_api = MagicMock()
-        mock_api.agent_dispatch.create_dispatch = AsyncMock()
+        context, userdata = make_mock_context(room_name="room-test")
 
-        mock_lk_instance = MagicMock()
-        mock_lk_instance.__aenter__ = AsyncMock(return_value=mock_api)
-        mock_lk_instance.__aexit__ = AsyncMock(return_value=False)
+        await dispatch(context)
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("livekit.api.LiveKitAPI", MagicMock(return_value=mock_lk_instance)),
-            patch("asyncio.create_task"),
-            patch("agent.agents.english_agent.EnglishAgent.__init__", return_value=None),
-        ):
-            from agent.agents.english_agent import EnglishAgent
-
-            instance = object.__new__(EnglishAgent)
-            await EnglishAgent.route_back_to_orchestrator(
-                instance, context, "Student asked about maths"
-            )
-
-        call_arg = mock_api.agent_dispatch.create_dispatch.call_args[0][0]
+        call_arg = dispatch_mocks.api.agent_dispatch.create_dispatch.call_args[0][0]
         assert isinstance(call_arg, CreateAgentDispatchRequest), (
             f"create_dispatch must receive CreateAgentDispatchRequest, got {type(call_arg)}"
         )
         assert call_arg.room == "room-test"
-        assert call_arg.agent_name == "learning-orchestrator"
-        assert "return_from_english:" in call_arg.metadata
+        assert call_arg.agent_name == expected_agent_name
+        for fragment in expected_metadata:
+            assert fragment in call_arg.metadata
 
 
 class TestPendingQuestion:
     """Root Cause B: verify _pending_question is set and used correctly."""
 
-    async def test_route_to_math_sets_pending_question(self):
-        """
-        _route_to_math_impl must set _pending_question on the returned MathAgent
-        so that on_enter() can immediately answer the student's question.
-        """
-        context, userdata = _make_mock_context()
-
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-            patch("agent.agents.math_agent.MathAgent.__init__", return_value=None),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.tools.routing import _route_to_math_impl
-
-            agent_mock = MagicMock()
-            agent_mock.agent_name = "orchestrator"
-            question = "What is the quadratic formula?"
-            specialist, _ = await _route_to_math_impl(agent_mock, context, question)
-
-        assert hasattr(specialist, "_pending_question"), (
-            "MathAgent returned from _route_to_math_impl must have _pending_question set"
-        )
-        assert specialist._pending_question == question
-
-    async def test_route_to_history_sets_pending_question(self):
+    @pytest.mark.parametrize(
+        "route_impl, specialist_init, question",
+        [
+            (
+                _route_to_math_impl,
+                "agent.agents.math_agent.MathAgent.__init__",
+                "What is the quadratic formula?",
+            ),
+            (
+                _route_to_history_impl,
+                "agent.agents.history_agent.HistoryAgent.__init__",
+                "Who was Julius Caesar?",
+            ),
+        ],
+        ids=["math", "history"],
+    )
+    async def test_route_sets_pending_question(
+        self, route_impl, specialist_init, question, dispatch_mocks, make_mock_context
+    ):
         """
-        _route_to_history_impl must set _pending_question on the returned HistoryAgent
-        so that on_enter() can immediately answer the student's question.
+        _route_to_math_impl / _route_to_history_impl must set _pending_question on the
+        returned specialist so that on_enter() can immediately answer the question.
         """
-        context, userdata = _make_mock_context()
-
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-            patch("agent.agents.history_agent.HistoryAgent.__init__", return_value=None),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
+        context, userdata = make_mock_context()
 
-            from agent.tools.routing import _route_to_history_impl
-
-            agent_mock = MagicMock()
-            agent_mock.agent_name = "orchestrator"
-            question = "Who was Julius Caesar?"
-            specialist, _ = await _route_to_history_impl(agent_mock, context, question)
+        with patch(specialist_init, return_value=None):
+            agent_mock = SimpleNamespace(agent_name="orchestrator")
+            specialist, _ = await route_impl(agent_mock, context, question)
 
         assert hasattr(specialist, "_pending_question"), (
-            "HistoryAgent returned from _route_to_history_impl must have _pending_question set"
+            "Specialist returned from the routing impl must have _pending_question set"
         )
         assert specialist._pending_question == question
 
@@ -198,8 +121,6 @@ class TestPendingQuestion:
         generate_reply() when the attribute is set. This causes the agent to
         immediately answer the question rather than waiting silently.
         """
-        import livekit.agents
-
         mock_session = MagicMock()
         mock_session.generate_reply = AsyncMock()
 
@@ -209,8 +130,6 @@ class TestPendingQuestion:
             mock_prop.return_value = mock_session
 
             with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.base import GuardedAgent
-
                 instance = object.__new__(GuardedAgent)
                 instance._pending_question = "Tell me about World War II"
                 await instance.on_enter()
@@ -224,8 +143,6 @@ class TestPendingQuestion:
         GuardedAgent.on_enter() must call generate_reply() with no arguments when
         _pending_question is not set, relying on conversation history for context.
         """
-        import livekit.agents
-
         mock_session = MagicMock()
         mock_session.generate_reply = AsyncMock()
 
@@ -235,8 +152,6 @@ class TestPendingQuestion:
             mock_prop.return_value = mock_session
 
             with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.base import GuardedAgent
-
                 instance = object.__new__(GuardedAgent)
                 # No _pending_question set — should use no user_input
                 await instance.on_enter()
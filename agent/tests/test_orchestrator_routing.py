@@ -4,286 +4,201 @@ Unit tests for routing logic.
 After the routing refactor, the actual logic lives in agent/tools/routing.py
 and is called via thin delegators in OrchestratorAgent, MathAgent, and
 HistoryAgent. Tests patch at the routing module boundary.
+
+Patches go through monkeypatch (function-scoped, undone at teardown), so each test
+is self-contained under pytest-xdist.
 """
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock, patch
+
+from opentelemetry.trace import StatusCode
+
+from agent.agents.base import GuardedAgent
+from agent.agents.history_agent import HistoryAgent
+from agent.agents.math_agent import MathAgent
+from agent.agents.orchestrator import OrchestratorAgent
+from agent.tests.fixtures.tracing import FakeTracer
 
 
-def _make_mock_context(session_id="sess-abc", room_name="room-1"):
-    """Build a minimal RunContext-like mock with SessionUserdata."""
-    from agent.models.session_state import SessionUserdata
+@pytest.fixture(autouse=True, scope="module")
+def _no_guarded_agent_init():
+    """Skip the LiveKit Agent/LLM constructor for every agent built in this module."""
+    with patch.object(GuardedAgent, "__init__", return_value=None):
+        yield
 
-    userdata = SessionUserdata(
-        student_identity="alice",
-        room_name=room_name,
-        session_id=session_id,
-    )
 
-    session = MagicMock()
-    session.userdata = userdata
-    session.history = MagicMock()
+@pytest.fixture
+def tracer(monkeypatch):
+    """
+    Install a FakeTracer as the routing tracer and stub the fire-and-forget side
+    effects (transcript_store writes via asyncio.create_task). Returns the tracer.
+    """
+    fake = FakeTracer()
+    monkeypatch.setattr("agent.tools.routing.tracer", fake)
+    monkeypatch.setattr("agent.tools.routing.transcript_store", MagicMock())
+    monkeypatch.setattr("asyncio.create_task", MagicMock())
+    return fake
 
-    context = MagicMock()
-    context.session = session
-    return context, userdata
+
+def _mock_class(monkeypatch, target):
+    """Replace the agent class at target (as the routing impls import it lazily)."""
+    mock_cls = MagicMock()
+    monkeypatch.setattr(target, mock_cls)
+    return mock_cls
 
 
 class TestOrchestratorInstantiation:
-    def test_instantiates_without_error(self):
+    def test_instantiates_without_error(self, monkeypatch):
         """OrchestratorAgent should construct without real LLM connection."""
-        with patch("agent.agents.orchestrator.anthropic") as mock_anthropic:
-            mock_llm = MagicMock()
-            mock_anthropic.LLM.return_value = mock_llm
+        mock_anthropic = _mock_class(monkeypatch, "agent.agents.orchestrator.anthropic")
+        mock_anthropic.LLM.return_value = MagicMock()
 
-            with patch("agent.agents.base.GuardedAgent.__init__", return_value=None):
-                from agent.agents.orchestrator import OrchestratorAgent
-                agent = OrchestratorAgent.__new__(OrchestratorAgent)
-                # If we get here without exception, instantiation logic is sound
-                assert agent is not None
+        agent = OrchestratorAgent.__new__(OrchestratorAgent)
+        # If we get here without exception, instantiation logic is sound
+        assert agent is not None
 
 
 class TestRoutingToMath:
-    async def test_route_to_math_updates_userdata(self):
-        context, userdata = _make_mock_context()
-
-        mock_math_agent = MagicMock()
-
-        with (
-            patch("agent.agents.math_agent.MathAgent") as MockMath,
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store") as mock_store,
-            patch("asyncio.create_task"),
-        ):
-            MockMath.return_value = mock_math_agent
-            mock_span = MagicMock()
-            mock_tracer.start_as_current_span.return_value.__enter__ = MagicMock(
-                return_value=mock_span
-            )
-            mock_tracer.start_as_current_span.return_value.__exit__ = MagicMock(
-                return_value=False
-            )
-
-            from agent.agents.orchestrator import OrchestratorAgent
-
-            with patch.object(
-                OrchestratorAgent.__bases__[0], "__init__", return_value=None
-            ):
-                instance = object.__new__(OrchestratorAgent)
-                instance.agent_name = "orchestrator"
-                result = await OrchestratorAgent.route_to_math(
-                    instance, context, "multiplication question"
-                )
+    async def test_route_to_math_updates_userdata(self, make_mock_context, monkeypatch, tracer):
+        context, userdata = make_mock_context()
+        _mock_class(monkeypatch, "agent.agents.math_agent.MathAgent")
+
+        instance = object.__new__(OrchestratorAgent)
+        instance.agent_name = "orchestrator"
+        await OrchestratorAgent.route_to_math(instance, context, "multiplication question")
 
         # userdata should reflect math routing
         assert userdata.current_subject == "math"
         assert userdata.turn_number == 1
 
-    async def test_route_to_math_sets_span_attributes(self):
-        context, userdata = _make_mock_context(session_id="span-test-session")
+    async def test_route_to_math_sets_span_attributes(
+        self, make_mock_context, monkeypatch, tracer
+    ):
+        context, userdata = make_mock_context(session_id="span-test-session")
+        _mock_class(monkeypatch, "agent.agents.math_agent.MathAgent")
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
+        instance = object.__new__(OrchestratorAgent)
+        instance.agent_name = "orchestrator"
+        await OrchestratorAgent.route_to_math(instance, context, "What is 7 times 8?")
 
-        with (
-            patch("agent.agents.math_agent.MathAgent"),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.orchestrator import OrchestratorAgent
-
-            with patch.object(
-                OrchestratorAgent.__bases__[0], "__init__", return_value=None
-            ):
-                instance = object.__new__(OrchestratorAgent)
-                instance.agent_name = "orchestrator"
-                await OrchestratorAgent.route_to_math(
-                    instance, context, "What is 7 times 8?"
-                )
-
-        # Span should have been created with "routing.decision"
-        mock_tracer.start_as_current_span.assert_called_once_with("routing.decision")
+        # Span should have been created with "routing.decision" and closed
+        assert tracer.names == ["routing.decision"]
+        assert tracer.spans[0].ended
 
         # Key attributes set on span
-        span_calls = mock_span.set_attribute.call_args_list
-        attr_names = [c[0][0] for c in span_calls]
-        assert "session_id" in attr_names
-        assert "to_agent" in attr_names
-        assert "turn_number" in attr_names
+        attrs = tracer.spans[0].attrs
+        assert "session_id" in attrs
+        assert "to_agent" in attrs
+        assert "turn_number" in attrs
+
+    async def test_error_inside_routing_span_marks_it_error(
+        self, make_mock_context, monkeypatch, tracer
+    ):
+        """A failure while the routing span is open is recorded on it, then re-raised."""
+        context, _ = make_mock_context()
+        error = RuntimeError("history unavailable")
+        monkeypatch.setattr(
+            "agent.tools.routing._get_history_length", MagicMock(side_effect=error)
+        )
+
+        instance = object.__new__(OrchestratorAgent)
+        instance.agent_name = "orchestrator"
+        with pytest.raises(RuntimeError):
+            await OrchestratorAgent.route_to_math(instance, context, "What is 7 times 8?")
+
+        span = tracer.spans[0]
+        assert span.ended
+        assert span.exceptions == [error]
+        assert span.status.status_code is StatusCode.ERROR
 
 
 class TestRoutingSpanEnrichment:
-    async def test_routing_span_includes_question_summary_and_previous_subject(self):
+    async def test_routing_span_includes_question_summary_and_previous_subject(
+        self, make_mock_context, monkeypatch, tracer
+    ):
         """After enrichment, routing spans should carry question_summary and previous_subject."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         # Set a prior subject so previous_subject is populated
         userdata.route_to("english")
+        _mock_class(monkeypatch, "agent.agents.history_agent.HistoryAgent")
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.agents.history_agent.HistoryAgent"),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.orchestrator import OrchestratorAgent
-
-            with patch.object(
-                OrchestratorAgent.__bases__[0], "__init__", return_value=None
-            ):
-                instance = object.__new__(OrchestratorAgent)
-                instance.agent_name = "orchestrator"
-                await OrchestratorAgent.route_to_history(
-                    instance, context, "Who was Julius Caesar?"
-                )
-
-        span_calls = {c[0][0]: c[0][1] for c in mock_span.set_attribute.call_args_list}
-        assert "question_summary" in span_calls
-        assert span_calls["question_summary"] == "Who was Julius Caesar?"
-        assert "previous_subject" in span_calls
-        assert span_calls["previous_subject"] == "english"
+        instance = object.__new__(OrchestratorAgent)
+        instance.agent_name = "orchestrator"
+        await OrchestratorAgent.route_to_history(instance, context, "Who was Julius Caesar?")
+
+        attrs = tracer.spans[0].attrs
+        assert attrs["question_summary"] == "Who was Julius Caesar?"
+        assert attrs["previous_subject"] == "english"
 
 
 class TestSpecialistHandback:
-    async def test_math_agent_can_route_back_to_orchestrator(self):
+    async def test_math_agent_can_route_back_to_orchestrator(
+        self, make_mock_context, monkeypatch, tracer
+    ):
         """MathAgent handback sets current_subject to 'orchestrator' and returns OrchestratorAgent."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         userdata.route_to("math")  # already in math session
+        MockOrchestrator = _mock_class(monkeypatch, "agent.agents.orchestrator.OrchestratorAgent")
 
-        mock_orchestrator = MagicMock()
-
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.agents.orchestrator.OrchestratorAgent") as MockOrchestrator,
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            MockOrchestrator.return_value = mock_orchestrator
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.math_agent import MathAgent
-
-            with patch.object(MathAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(MathAgent)
-                instance.agent_name = "math"
-                result = await MathAgent.route_back_to_orchestrator(
-                    instance, context, "Finished explaining multiplication"
-                )
+        instance = object.__new__(MathAgent)
+        instance.agent_name = "math"
+        result = await MathAgent.route_back_to_orchestrator(
+            instance, context, "Finished explaining multiplication"
+        )
 
         assert userdata.current_subject == "orchestrator"
         assert userdata.turn_number == 1
         agent_result, announcement = result
-        assert agent_result is mock_orchestrator
+        assert agent_result is MockOrchestrator.return_value
         assert "tutor" in announcement.lower()
 
-    async def test_history_agent_can_route_back_to_orchestrator(self):
+    async def test_history_agent_can_route_back_to_orchestrator(
+        self, make_mock_context, monkeypatch, tracer
+    ):
         """HistoryAgent handback sets current_subject to 'orchestrator' and returns OrchestratorAgent."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         userdata.route_to("history")  # already in history session
+        MockOrchestrator = _mock_class(monkeypatch, "agent.agents.orchestrator.OrchestratorAgent")
 
-        mock_orchestrator = MagicMock()
-
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.agents.orchestrator.OrchestratorAgent") as MockOrchestrator,
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            MockOrchestrator.return_value = mock_orchestrator
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.history_agent import HistoryAgent
-
-            with patch.object(HistoryAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(HistoryAgent)
-                instance.agent_name = "history"
-                result = await HistoryAgent.route_back_to_orchestrator(
-                    instance, context, "Finished explaining WW2"
-                )
+        instance = object.__new__(HistoryAgent)
+        instance.agent_name = "history"
+        result = await HistoryAgent.route_back_to_orchestrator(
+            instance, context, "Finished explaining WW2"
+        )
 
         assert userdata.current_subject == "orchestrator"
         assert userdata.turn_number == 1
         agent_result, announcement = result
-        assert agent_result is mock_orchestrator
+        assert agent_result is MockOrchestrator.return_value
         assert "tutor" in announcement.lower()
 
-    async def test_previous_subject_captured_before_route_update(self):
+    async def test_previous_subject_captured_before_route_update(
+        self, make_mock_context, monkeypatch, tracer
+    ):
         """OTEL span must show previous_subject='math' and to_agent='orchestrator'."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         userdata.route_to("math")  # set subject to math before handback
+        _mock_class(monkeypatch, "agent.agents.orchestrator.OrchestratorAgent")
+
+        instance = object.__new__(MathAgent)
+        instance.agent_name = "math"
+        await MathAgent.route_back_to_orchestrator(instance, context, "Topic complete")
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.agents.orchestrator.OrchestratorAgent"),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.math_agent import MathAgent
-
-            with patch.object(MathAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(MathAgent)
-                instance.agent_name = "math"
-                await MathAgent.route_back_to_orchestrator(
-                    instance, context, "Topic complete"
-                )
-
-        span_calls = {c[0][0]: c[0][1] for c in mock_span.set_attribute.call_args_list}
-        assert span_calls.get("from_agent") == "math"
-        assert span_calls.get("to_agent") == "orchestrator"
-        assert span_calls.get("previous_subject") == "math"
-
-    async def test_handback_span_uses_routing_decision_name(self):
+        attrs = tracer.spans[0].attrs
+        assert attrs.get("from_agent") == "math"
+        assert attrs.get("to_agent") == "orchestrator"
+        assert attrs.get("previous_subject") == "math"
+
+    async def test_handback_span_uses_routing_decision_name(
+        self, make_mock_context, monkeypatch, tracer
+    ):
         """Handback span must be created with 'routing.decision' span name."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         userdata.route_to("history")
+        _mock_class(monkeypatch, "agent.agents.orchestrator.OrchestratorAgent")
+
+        instance = object.__new__(HistoryAgent)
+        instance.agent_name = "history"
+        await HistoryAgent.route_back_to_orchestrator(instance, context, "Topic complete")
 
-        mock_span = MagicMock()
-        mock_ctx_manager = MagicMock()
-        mock_ctx_manager.__enter__ = MagicMock(return_value=mock_span)
-        mock_ctx_manager.__exit__ = MagicMock(return_value=False)
-
-        with (
-            patch("agent.agents.orchestrator.OrchestratorAgent"),
-            patch("agent.tools.routing.tracer") as mock_tracer,
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            mock_tracer.start_as_current_span.return_value = mock_ctx_manager
-
-            from agent.agents.history_agent import HistoryAgent
-
-            with patch.object(HistoryAgent.__bases__[0], "__init__", return_value=None):
-                instance = object.__new__(HistoryAgent)
-                instance.agent_name = "history"
-                await HistoryAgent.route_back_to_orchestrator(
-                    instance, context, "Topic complete"
-                )
-
-        mock_tracer.start_as_current_span.assert_called_once_with("routing.decision")
+        assert tracer.names == ["routing.decision"]
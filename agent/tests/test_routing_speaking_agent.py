@@ -11,24 +11,70 @@ AFTER the transition message has been committed to history. The routing function
 leave speaking_agent unchanged so the transition message is attributed to the correct
 outgoing agent.
 """
-import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from livekit.agents import llm
+
+import agent.tools.routing as routing_module
+from agent.tests.fixtures.tracing import FakeTracer
+from agent.tools.routing import (
+    _route_to_history_impl,
+    _route_to_math_impl,
+    _route_to_orchestrator_impl,
+)
+
+# (impl, question/reason, outgoing agent, incoming agent). The outgoing agent is
+# speaking when it calls the routing tool, and its farewell/transition sentence
+# fires AFTER the call returns — so speaking_agent must still name it.
+ROUTES = [
+    (_route_to_math_impl, "7 times 8", "orchestrator", "math"),
+    (_route_to_history_impl, "WW2 causes", "orchestrator", "history"),
+    (_route_to_orchestrator_impl, "answered maths q", "math", "orchestrator"),
+]
+
+# Shared by every context: the specialists copy chat_ctx on construction and the
+# routing impls only read history.messages(), so nothing ever mutates it
+_EMPTY_HISTORY = llm.ChatContext.empty()
+
+# Built once at import; the module-scoped fixture below installs it for every case
+_TRACER = FakeTracer()
+
 
+async def _noop_save(*args, **kwargs) -> None:
+    """Stands in for transcript_store.save_routing_decision; nothing asserts on it."""
 
-def _make_mock_context(userdata):
-    """Build a minimal RunContext mock backed by the given userdata."""
-    mock_session = MagicMock()
-    mock_session.userdata = userdata
-    mock_history = MagicMock()
-    mock_history.messages.return_value = []
-    mock_session.history = mock_history
 
-    mock_context = MagicMock()
-    mock_context.session = mock_session
-    return mock_context
+@pytest.fixture(autouse=True, scope="module")
+def _patch_routing_side_effects():
+    """
+    Stub the routing tracer and the transcript write once for the whole module —
+    no test here asserts on either, they just must not reach OTEL or Supabase.
+    """
+    with patch.object(routing_module, "tracer", _TRACER), \
+         patch.object(routing_module.transcript_store, "save_routing_decision", _noop_save):
+        yield
+
+
+@pytest.fixture
+def make_context(make_mock_context):
+    """
+    Factory: (context, userdata) from the shared make_mock_context — userdata is a
+    copy of the session template — with history swapped for a real (empty)
+    ChatContext, since these tests construct the specialists for real.
+    """
+    def _make():
+        context, userdata = make_mock_context()
+        context.session.history = _EMPTY_HISTORY
+        return context, userdata
 
+    return _make
 
+
+# One worker runs all the ROUTES cases, so the module-scoped patches and the
+# specialist agent imports are set up once rather than once per worker
+@pytest.mark.xdist_group(name="routing")
 class TestRoutingDoesNotChangeSpeakingAgent:
     """
     Verify routing functions leave userdata.speaking_agent UNCHANGED.
@@ -40,109 +86,30 @@ class TestRoutingDoesNotChangeSpeakingAgent:
     the original PLAN10 implementation that was later reverted.
     """
 
-    @pytest.mark.asyncio
-    async def test_route_to_math_leaves_speaking_agent_unchanged(self):
+    @pytest.mark.parametrize(
+        "impl, text, from_agent, to_agent",
+        ROUTES,
+        ids=["to_math", "to_history", "back_to_orchestrator"],
+    )
+    async def test_routing_leaves_speaking_agent_unchanged(
+        self, make_context, impl, text, from_agent, to_agent
+    ):
         """
-        _route_to_math_impl must NOT modify userdata.speaking_agent.
-        The transition message is still spoken by the orchestrator after this call.
+        The routing impl must NOT modify userdata.speaking_agent — that is
+        on_enter()'s responsibility, after the outgoing agent has finished speaking.
         """
-        from agent.models.session_state import SessionUserdata
-        from agent.tools.routing import _route_to_math_impl
-
-        userdata = SessionUserdata(student_identity="alice", room_name="room-1")
-        userdata.speaking_agent = "orchestrator"   # set by orchestrator.on_enter
-
-        mock_context = _make_mock_context(userdata)
-        mock_agent = MagicMock()
-        mock_agent.agent_name = "orchestrator"
-
-        import agent.tools.routing as routing_module
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
-        mock_span.__enter__ = MagicMock(return_value=mock_span)
-        mock_span.__exit__ = MagicMock(return_value=False)
-        mock_tracer.start_as_current_span.return_value = mock_span
-
-        from unittest.mock import patch
-        with patch.object(routing_module, "tracer", mock_tracer), \
-             patch.object(routing_module.transcript_store, "save_routing_decision", AsyncMock()):
-            result = await _route_to_math_impl(mock_agent, mock_context, "7 times 8")
-
-        # speaking_agent must remain "orchestrator" — the transition message
-        # "Let me connect you with our Mathematics tutor!" fires AFTER this
-        # call and must still be attributed to the orchestrator.
-        assert userdata.speaking_agent == "orchestrator", (
-            f"Expected speaking_agent='orchestrator' (unchanged) but got "
-            f"'{userdata.speaking_agent}'. Routing functions must NOT change "
-            "speaking_agent — that is on_enter()'s responsibility."
-        )
-        assert isinstance(result, tuple)
-        assert result[0].agent_name == "math"   # type: ignore[attr-defined]
+        context, userdata = make_context()
+        if from_agent != "orchestrator":
+            userdata.route_to(from_agent)
+        userdata.speaking_agent = from_agent   # set by the outgoing agent's on_enter
 
-    @pytest.mark.asyncio
-    async def test_route_to_history_leaves_speaking_agent_unchanged(self):
-        """
-        _route_to_history_impl must NOT modify userdata.speaking_agent.
-        """
-        from agent.models.session_state import SessionUserdata
-        from agent.tools.routing import _route_to_history_impl
-
-        userdata = SessionUserdata(student_identity="bob", room_name="room-2")
-        userdata.speaking_agent = "orchestrator"
-
-        mock_context = _make_mock_context(userdata)
-        mock_agent = MagicMock()
-        mock_agent.agent_name = "orchestrator"
-
-        import agent.tools.routing as routing_module
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
-        mock_span.__enter__ = MagicMock(return_value=mock_span)
-        mock_span.__exit__ = MagicMock(return_value=False)
-        mock_tracer.start_as_current_span.return_value = mock_span
-
-        from unittest.mock import patch
-        with patch.object(routing_module, "tracer", mock_tracer), \
-             patch.object(routing_module.transcript_store, "save_routing_decision", AsyncMock()):
-            result = await _route_to_history_impl(mock_agent, mock_context, "WW2 causes")
-
-        assert userdata.speaking_agent == "orchestrator", (
-            f"Expected speaking_agent='orchestrator' (unchanged) but got '{userdata.speaking_agent}'."
-        )
-        assert isinstance(result, tuple)
-        assert result[0].agent_name == "history"   # type: ignore[attr-defined]
+        mock_agent = SimpleNamespace(agent_name=from_agent)
+        result = await impl(mock_agent, context, text)
 
-    @pytest.mark.asyncio
-    async def test_route_back_to_orchestrator_leaves_speaking_agent_unchanged(self):
-        """
-        _route_to_orchestrator_impl must NOT modify userdata.speaking_agent.
-        The math agent's farewell sentence fires after this call and must still
-        be attributed to "math".
-        """
-        from agent.models.session_state import SessionUserdata
-        from agent.tools.routing import _route_to_orchestrator_impl
-
-        userdata = SessionUserdata(student_identity="carol", room_name="room-3")
-        userdata.route_to("math")
-        userdata.speaking_agent = "math"   # set by math.on_enter
-
-        mock_context = _make_mock_context(userdata)
-        mock_agent = MagicMock()
-        mock_agent.agent_name = "math"
-
-        import agent.tools.routing as routing_module
-        mock_tracer = MagicMock()
-        mock_span = MagicMock()
-        mock_span.__enter__ = MagicMock(return_value=mock_span)
-        mock_span.__exit__ = MagicMock(return_value=False)
-        mock_tracer.start_as_current_span.return_value = mock_span
-
-        from unittest.mock import patch
-        with patch.object(routing_module, "tracer", mock_tracer), \
-             patch.object(routing_module.transcript_store, "save_routing_decision", AsyncMock()):
-            result = await _route_to_orchestrator_impl(mock_agent, mock_context, "answered maths q")
-
-        assert userdata.speaking_agent == "math", (
-            f"Expected speaking_agent='math' (unchanged) but got '{userdata.speaking_agent}'."
+        assert userdata.speaking_agent == from_agent, (
+            f"Expected speaking_agent={from_agent!r} (unchanged) but got "
+            f"{userdata.speaking_agent!r}. Routing functions must NOT change "
+            "speaking_agent — that is on_enter()'s responsibility."
         )
         assert isinstance(result, tuple)
+        assert result[0].agent_name == to_agent   # type: ignore[attr-defined]
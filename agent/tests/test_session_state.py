@@ -58,6 +58,19 @@ def test_route_to_tracks_full_history():
     assert ud.previous_subjects == ["math", "english"]
 
 
+def test_route_to_records_subjects_seen():
+    ud = SessionUserdata()
+    ud.route_to("math")
+    ud.route_to("history")
+    ud.route_to("math")
+    assert ud.subjects_seen == {"math", "history"}
+
+
+def test_initial_subject_counts_as_seen():
+    ud = SessionUserdata(current_subject="english")
+    assert ud.subjects_seen == {"english"}
+
+
 def test_to_dict_contains_all_fields():
     ud = SessionUserdata(student_identity="bob", room_name="room-42")
     d = ud.to_dict()
@@ -87,3 +100,10 @@ def test_session_id_is_unique():
     ud1 = SessionUserdata()
     ud2 = SessionUserdata()
     assert ud1.session_id != ud2.session_id
+
+
+def test_unknown_attribute_is_rejected():
+    """slots=True: a misspelt field raises instead of silently adding a new attribute."""
+    ud = SessionUserdata()
+    with pytest.raises(AttributeError):
+        ud.turn_numbr = 5
@@ -16,16 +16,26 @@ Six test classes:
 """
 from __future__ import annotations
 
-import pytest
+import functools
 from types import SimpleNamespace
+
+import pytest
 from unittest.mock import AsyncMock, MagicMock, patch, call
 
 from agent.tests.fixtures.synthetic_questions import (
-    MATH_QUESTIONS,
-    HISTORY_QUESTIONS,
-    ENGLISH_QUESTIONS,
-    GUARDRAIL_INPUTS,
-    ESCALATION_SIGNALS,
+    MATH_PARAMS,
+    HISTORY_PARAMS,
+    ENGLISH_PARAMS,
+    GUARDRAIL_PARAMS,
+    ESCALATION_PARAMS,
+)
+from agent.tests.fixtures.tracing import FakeTracer
+from agent.tests.fixtures.moderation import (
+    ModerationApiResponse,
+    ModerationApiResult,
+    ModerationCategories,
+    ModerationScores,
+    category_attr,
 )
 
 
@@ -33,105 +43,44 @@ from agent.tests.fixtures.synthetic_questions import (
 # Shared helpers
 # ---------------------------------------------------------------------------
 
-def _make_mock_context(session_id="sess-synthetic", room_name="room-synthetic"):
-    """Build a minimal RunContext-like mock with SessionUserdata."""
-    from agent.models.session_state import SessionUserdata
-
-    userdata = SessionUserdata(
-        student_identity="student-test",
-        room_name=room_name,
-        session_id=session_id,
-    )
-
-    session = MagicMock()
-    session.userdata = userdata
-    session.history = MagicMock()
-
-    context = MagicMock()
-    context.session = session
-    return context, userdata
-
-
 def _make_mock_agent(agent_name="orchestrator"):
-    """Minimal agent mock with agent_name attribute."""
-    agent = MagicMock()
-    agent.agent_name = agent_name
-    return agent
-
-
-def _make_tracer_mock():
-    """Return (mock_tracer, mock_span) configured as a sync context manager."""
-    mock_span = MagicMock()
-    mock_ctx = MagicMock()
-    mock_ctx.__enter__ = MagicMock(return_value=mock_span)
-    mock_ctx.__exit__ = MagicMock(return_value=False)
-    mock_tracer = MagicMock()
-    mock_tracer.start_as_current_span.return_value = mock_ctx
-    return mock_tracer, mock_span
+    """Minimal agent stand-in: the routing impls only read agent_name."""
+    return SimpleNamespace(agent_name=agent_name)
 
 
+@functools.cache
 def _make_moderation_response_for_category(category: str):
     """
     Build a mock OpenAI moderation response with exactly one category flagged.
     The input text is irrelevant — only the category matters.
+    Cached per category: both guardrail tests share it, and check() only reads it.
     """
-    # Maps category name → SimpleNamespace attribute name
-    cat_attr_map = {
-        "harassment": "harassment",
-        "harassment/threatening": "harassment_threatening",
-        "hate": "hate",
-        "hate/threatening": "hate_threatening",
-        "sexual": "sexual",
-        "sexual/minors": "sexual_minors",
-        "violence": "violence",
-        "violence/graphic": "violence_graphic",
-        "self-harm": "self_harm",
-        "self-harm/intent": "self_harm_intent",
-        "self-harm/instructions": "self_harm_instructions",
-        "illicit": "illicit",
-        "illicit/violent": "illicit_violent",
-    }
-
-    attr_name = cat_attr_map[category]
-
-    # All False except the target category
-    cat_kwargs = {v: False for v in cat_attr_map.values()}
-    cat_kwargs[attr_name] = True
-    cat_obj = SimpleNamespace(**cat_kwargs)
-
-    # All 0.01 except the target (0.9)
-    score_kwargs = {v: 0.01 for v in cat_attr_map.values()}
-    score_kwargs[attr_name] = 0.9
-    score_obj = SimpleNamespace(**score_kwargs)
-
-    result = SimpleNamespace(
+    # All False / 0.01 except the target category (True / 0.9)
+    attr_name = category_attr(category)
+    result = ModerationApiResult(
         flagged=True,
-        categories=cat_obj,
-        category_scores=score_obj,
+        categories=ModerationCategories(**{attr_name: True}),
+        category_scores=ModerationScores(**{attr_name: 0.9}),
     )
-    return SimpleNamespace(results=[result])
+    return ModerationApiResponse(results=(result,))
 
 
 # ---------------------------------------------------------------------------
 # 1. TestSyntheticMathRouting — 10 parametrised cases
 # ---------------------------------------------------------------------------
 
-@pytest.mark.parametrize(
-    "question",
-    MATH_QUESTIONS,
-    ids=[q.category for q in MATH_QUESTIONS],
-)
+@pytest.mark.parametrize("question", MATH_PARAMS)
 class TestSyntheticMathRouting:
-    async def test_route_to_math_updates_state_and_span(self, question):
+    async def test_route_to_math_updates_state_and_span(self, question, make_mock_context):
         """Routing to math sets userdata, pending question, skip flag, and span attributes."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         agent = _make_mock_agent("orchestrator")
         mock_specialist = MagicMock()
-        mock_tracer, mock_span = _make_tracer_mock()
+        tracer = FakeTracer()
 
         with (
             patch("agent.agents.math_agent.MathAgent") as MockMath,
-            patch("agent.tools.routing.tracer", mock_tracer),
+            patch("agent.tools.routing.tracer", tracer),
             patch("agent.tools.routing.transcript_store"),
             patch("asyncio.create_task"),
         ):
@@ -149,7 +98,7 @@ class TestSyntheticMathRouting:
         assert specialist._pending_question == question.question
 
         # OTEL span attributes
-        span_calls = {c[0][0]: c[0][1] for c in mock_span.set_attribute.call_args_list}
+        span_calls = tracer.spans[0].attrs
         assert span_calls.get("to_agent") == "math"
         assert span_calls.get("question_summary") == question.question
         assert "session_id" in span_calls
@@ -160,22 +109,18 @@ class TestSyntheticMathRouting:
 # 2. TestSyntheticHistoryRouting — 10 parametrised cases
 # ---------------------------------------------------------------------------
 
-@pytest.mark.parametrize(
-    "question",
-    HISTORY_QUESTIONS,
-    ids=[q.category for q in HISTORY_QUESTIONS],
-)
+@pytest.mark.parametrize("question", HISTORY_PARAMS)
 class TestSyntheticHistoryRouting:
-    async def test_route_to_history_updates_state_and_span(self, question):
+    async def test_route_to_history_updates_state_and_span(self, question, make_mock_context):
         """Routing to history sets userdata, pending question, skip flag, and span attributes."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         agent = _make_mock_agent("orchestrator")
         mock_specialist = MagicMock()
-        mock_tracer, mock_span = _make_tracer_mock()
+        tracer = FakeTracer()
 
         with (
             patch("agent.agents.history_agent.HistoryAgent") as MockHistory,
-            patch("agent.tools.routing.tracer", mock_tracer),
+            patch("agent.tools.routing.tracer", tracer),
             patch("agent.tools.routing.transcript_store"),
             patch("asyncio.create_task"),
         ):
@@ -193,7 +138,7 @@ class TestSyntheticHistoryRouting:
         assert specialist._pending_question == question.question
 
         # OTEL span attributes
-        span_calls = {c[0][0]: c[0][1] for c in mock_span.set_attribute.call_args_list}
+        span_calls = tracer.spans[0].attrs
         assert span_calls.get("to_agent") == "history"
         assert span_calls.get("question_summary") == question.question
         assert "session_id" in span_calls
@@ -204,34 +149,18 @@ class TestSyntheticHistoryRouting:
 # 3. TestSyntheticEnglishRouting — 10 parametrised cases
 # ---------------------------------------------------------------------------
 
-@pytest.mark.parametrize(
-    "question",
-    ENGLISH_QUESTIONS,
-    ids=[q.category for q in ENGLISH_QUESTIONS],
-)
+@pytest.mark.parametrize("question", ENGLISH_PARAMS)
 class TestSyntheticEnglishRouting:
-    async def test_route_to_english_dispatches_agent(self, question):
+    async def test_route_to_english_dispatches_agent(
+        self, question, dispatch_mocks, make_mock_context
+    ):
         """Routing to English updates userdata and dispatches learning-english worker."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         agent = _make_mock_agent("orchestrator")
-        mock_tracer, mock_span = _make_tracer_mock()
+        mock_api, tracer = dispatch_mocks.api, dispatch_mocks.tracer
 
-        # Build async context manager mock for LiveKitAPI
-        mock_api = MagicMock()
-        mock_api.agent_dispatch.create_dispatch = AsyncMock()
-        mock_lk_instance = AsyncMock()
-        mock_lk_instance.__aenter__ = AsyncMock(return_value=mock_api)
-        mock_lk_instance.__aexit__ = AsyncMock(return_value=None)
-        MockLiveKitAPI = MagicMock(return_value=mock_lk_instance)
-
-        with (
-            patch("livekit.api.LiveKitAPI", MockLiveKitAPI),
-            patch("agent.tools.routing.tracer", mock_tracer),
-            patch("agent.tools.routing.transcript_store"),
-            patch("asyncio.create_task"),
-        ):
-            from agent.tools.routing import _route_to_english_impl
-            result = await _route_to_english_impl(agent, context, question.question)
+        from agent.tools.routing import _route_to_english_impl
+        result = await _route_to_english_impl(agent, context, question.question)
 
         # userdata updated
         assert userdata.current_subject == "english"
@@ -249,7 +178,7 @@ class TestSyntheticEnglishRouting:
         assert "english" in result.lower()
 
         # Span has correct attributes
-        span_calls = {c[0][0]: c[0][1] for c in mock_span.set_attribute.call_args_list}
+        span_calls = tracer.spans[0].attrs
         assert span_calls.get("to_agent") == "english"
         assert span_calls.get("question_summary") == question.question
 
@@ -258,21 +187,17 @@ class TestSyntheticEnglishRouting:
 # 4. TestSyntheticGuardrailTrigger — 13 parametrised cases (one per category)
 # ---------------------------------------------------------------------------
 
-@pytest.mark.parametrize(
-    "guardrail_input",
-    GUARDRAIL_INPUTS,
-    ids=[g.category for g in GUARDRAIL_INPUTS],
-)
+@pytest.mark.parametrize("guardrail_input", GUARDRAIL_PARAMS)
 class TestSyntheticGuardrailTrigger:
-    async def test_check_returns_flagged_for_category(self, guardrail_input):
+    async def test_check_returns_flagged_for_category(
+        self, guardrail_input, guardrail_module, openai_moderation_mock
+    ):
         """check() returns flagged=True and the category appears in result.categories."""
-        mock_response = _make_moderation_response_for_category(guardrail_input.category)
-
-        with patch("agent.services.guardrail._openai_client") as mock_client:
-            mock_client.moderations.create = AsyncMock(return_value=mock_response)
+        openai_moderation_mock.return_value = _make_moderation_response_for_category(
+            guardrail_input.category
+        )
 
-            from agent.services.guardrail import check
-            result = await check(guardrail_input.input_text)
+        result = await guardrail_module.check(guardrail_input.input_text)
 
         assert result.flagged is True, (
             f"Expected flagged=True for category '{guardrail_input.category}'"
@@ -281,24 +206,22 @@ class TestSyntheticGuardrailTrigger:
             f"Expected '{guardrail_input.category}' in result.categories, got {result.categories}"
         )
 
-    async def test_check_and_rewrite_calls_rewrite_once_when_flagged(self, guardrail_input):
+    async def test_check_and_rewrite_calls_rewrite_once_when_flagged(
+        self, guardrail_input, guardrail_module, openai_moderation_mock, monkeypatch
+    ):
         """check_and_rewrite() calls rewrite() exactly once when content is flagged."""
-        mock_response = _make_moderation_response_for_category(guardrail_input.category)
-
-        with (
-            patch("agent.services.guardrail._openai_client") as mock_oai,
-            patch("agent.services.guardrail.rewrite", new_callable=AsyncMock) as mock_rewrite,
-            patch("asyncio.create_task"),
-        ):
-            mock_oai.moderations.create = AsyncMock(return_value=mock_response)
-            mock_rewrite.return_value = "Safe educational content."
-
-            from agent.services.guardrail import check_and_rewrite
-            result = await check_and_rewrite(
-                guardrail_input.input_text,
-                session_id="sess-guardrail-test",
-                agent_name="test-agent",
-            )
+        openai_moderation_mock.return_value = _make_moderation_response_for_category(
+            guardrail_input.category
+        )
+        mock_rewrite = AsyncMock(return_value="Safe educational content.")
+        monkeypatch.setattr(guardrail_module, "rewrite", mock_rewrite)
+        monkeypatch.setattr("asyncio.create_task", MagicMock())
+
+        result = await guardrail_module.check_and_rewrite(
+            guardrail_input.input_text,
+            session_id="sess-guardrail-test",
+            agent_name="test-agent",
+        )
 
         mock_rewrite.assert_called_once()
         assert result == "Safe educational content."
@@ -308,20 +231,16 @@ class TestSyntheticGuardrailTrigger:
 # 5. TestSyntheticEscalation — 6 parametrised cases
 # ---------------------------------------------------------------------------
 
-@pytest.mark.parametrize(
-    "signal",
-    ESCALATION_SIGNALS,
-    ids=[s.category for s in ESCALATION_SIGNALS],
-)
+@pytest.mark.parametrize("signal", ESCALATION_PARAMS)
 class TestSyntheticEscalation:
-    async def test_escalation_sets_userdata_and_calls_teacher(self, signal):
+    async def test_escalation_sets_userdata_and_calls_teacher(self, signal, make_mock_context):
         """_escalate_impl sets escalated=True, stores reason, and calls human_escalation."""
-        context, userdata = _make_mock_context()
+        context, userdata = make_mock_context()
         agent = _make_mock_agent("orchestrator")
-        mock_tracer, mock_span = _make_tracer_mock()
+        tracer = FakeTracer()
 
         with (
-            patch("agent.tools.routing.tracer", mock_tracer),
+            patch("agent.tools.routing.tracer", tracer),
             patch("agent.tools.routing.transcript_store"),
             patch(
                 "agent.tools.routing.human_escalation.escalate_to_teacher",
@@ -342,7 +261,7 @@ class TestSyntheticEscalation:
         assert len(result) > 0
 
         # Span recorded the escalation reason
-        span_calls = {c[0][0]: c[0][1] for c in mock_span.set_attribute.call_args_list}
+        span_calls = tracer.spans[0].attrs
         assert "reason" in span_calls
         assert signal.question[:500] == span_calls["reason"]
 
@@ -417,10 +336,9 @@ class TestAgentSystemPromptValidation:
     def test_guardrail_inputs_fixture_covers_all_moderation_categories(self):
         """GUARDRAIL_INPUTS fixture must cover every entry in MODERATION_CATEGORIES."""
         from agent.services.guardrail import MODERATION_CATEGORIES
-        from agent.tests.fixtures.synthetic_questions import GUARDRAIL_INPUTS
+        from agent.tests.fixtures.synthetic_questions import GUARDRAIL_INPUTS_BY_CATEGORY
 
-        fixture_categories = {g.category for g in GUARDRAIL_INPUTS}
-        missing = [c for c in MODERATION_CATEGORIES if c not in fixture_categories]
+        missing = [c for c in MODERATION_CATEGORIES if c not in GUARDRAIL_INPUTS_BY_CATEGORY]
         assert not missing, (
             f"GUARDRAIL_INPUTS missing categories: {missing}"
         )
@@ -15,12 +15,14 @@ create a cycle if imported at module level here).
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
 import os
 import time
 
 from livekit.agents import RunContext
 from livekit.protocol.agent_dispatch import CreateAgentDispatchRequest
+from opentelemetry.trace import Status, StatusCode
 
 from agent.services import transcript_store, human_escalation
 from agent.services.langfuse_setup import get_tracer
@@ -28,6 +30,32 @@ from agent.services.langfuse_setup import get_tracer
 logger = logging.getLogger(__name__)
 tracer = get_tracer("routing")
 
+# Free-text span attributes (question_summary, last_user_message, reason). The
+# last-user-message preview walks the whole session history on every decision;
+# AGENT_TRACE_PREVIEW=0 drops all three. Resolved once at import.
+_TRACE_PREVIEW = os.environ.get("AGENT_TRACE_PREVIEW", "1") == "1"
+
+
+@contextlib.contextmanager
+def _decision_span(name: str):
+    """
+    Open a span under the current context without making it the current span.
+
+    Routing and escalation spans are leaves — nothing starts a child span inside
+    them — so start_as_current_span's context attach/detach on every decision is
+    pure overhead. The span is still parented to the active session trace. An
+    exception is recorded and marks the span ERROR, as start_as_current_span would.
+    """
+    span = tracer.start_span(name)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        span.set_status(Status(StatusCode.ERROR))
+        raise
+    finally:
+        span.end()
+
 
 def _get_last_user_message(context: RunContext) -> str:
     """Extract the most recent user message text for observability spans."""
@@ -44,6 +72,16 @@ def _get_last_user_message(context: RunContext) -> str:
     return ""
 
 
+def _text_previews(context: RunContext, question_summary: str) -> dict:
+    """Free-text routing span attributes, or {} when AGENT_TRACE_PREVIEW=0."""
+    if not _TRACE_PREVIEW:
+        return {}
+    return {
+        "question_summary": question_summary,
+        "last_user_message": _get_last_user_message(context),
+    }
+
+
 def _get_history_length(context: RunContext) -> int:
     """Count messages in session history for observability spans."""
     try:
@@ -68,18 +106,22 @@ async def _route_to_math_impl(agent, context: RunContext, question_summary: str)
     # must be attributed to the orchestrator, not math. speaking_agent is set in
     # GuardedAgent.on_enter() which fires AFTER the transition message. (PLAN10 fix revert)
 
-    with tracer.start_as_current_span("routing.decision") as span:
-        span.set_attribute("session_id", session_id)
-        span.set_attribute("from_agent", from_agent)
-        span.set_attribute("to_agent", "math")
-        span.set_attribute("turn_number", turn_number)
-        span.set_attribute("question_summary", question_summary)
-        span.set_attribute("previous_subject", previous_subject)
-        span.set_attribute("last_user_message", _get_last_user_message(context))
-        span.set_attribute("history_length", _get_history_length(context))
-        span.set_attribute("langfuse.session_id", session_id)
-        span.set_attribute("langfuse.user_id", userdata.student_identity)
-        span.set_attribute("decision_ms", round((time.perf_counter() - t0) * 1000))
+    with _decision_span("routing.decision") as span:
+        # Sampled-out spans skip the history scans and attribute work entirely;
+        # one set_attributes() call validates the whole batch in a single pass
+        if span.is_recording():
+            span.set_attributes({
+                "session_id": session_id,
+                "from_agent": from_agent,
+                "to_agent": "math",
+                "turn_number": turn_number,
+                "previous_subject": previous_subject,
+                **_text_previews(context, question_summary),
+                "history_length": _get_history_length(context),
+                "langfuse.session_id": session_id,
+                "langfuse.user_id": userdata.student_identity,
+                "decision_ms": round((time.perf_counter() - t0) * 1000),
+            })
 
     asyncio.create_task(transcript_store.save_routing_decision(
         session_id=session_id,
@@ -110,18 +152,20 @@ async def _route_to_history_impl(agent, context: RunContext, question_summary: s
     # NOTE: do NOT set speaking_agent here — same reason as _route_to_math_impl above.
     # The transition message is spoken by the current agent and must keep its attribution.
 
-    with tracer.start_as_current_span("routing.decision") as span:
-        span.set_attribute("session_id", session_id)
-        span.set_attribute("from_agent", from_agent)
-        span.set_attribute("to_agent", "history")
-        span.set_attribute("turn_number", turn_number)
-        span.set_attribute("question_summary", question_summary)
-        span.set_attribute("previous_subject", previous_subject)
-        span.set_attribute("last_user_message", _get_last_user_message(context))
-        span.set_attribute("history_length", _get_history_length(context))
-        span.set_attribute("langfuse.session_id", session_id)
-        span.set_attribute("langfuse.user_id", userdata.student_identity)
-        span.set_attribute("decision_ms", round((time.perf_counter() - t0) * 1000))
+    with _decision_span("routing.decision") as span:
+        if span.is_recording():
+            span.set_attributes({
+                "session_id": session_id,
+                "from_agent": from_agent,
+                "to_agent": "history",
+                "turn_number": turn_number,
+                "previous_subject": previous_subject,
+                **_text_previews(context, question_summary),
+                "history_length": _get_history_length(context),
+                "langfuse.session_id": session_id,
+                "langfuse.user_id": userdata.student_identity,
+                "decision_ms": round((time.perf_counter() - t0) * 1000),
+            })
 
     asyncio.create_task(transcript_store.save_routing_decision(
         session_id=session_id,
@@ -149,18 +193,20 @@ async def _route_to_english_impl(agent, context: RunContext, question_summary: s
     turn_number = userdata.advance_turn()
     userdata.route_to("english")
 
-    with tracer.start_as_current_span("routing.decision") as span:
-        span.set_attribute("session_id", session_id)
-        span.set_attribute("from_agent", from_agent)
-        span.set_attribute("to_agent", "english")
-        span.set_attribute("turn_number", turn_number)
-        span.set_attribute("question_summary", question_summary)
-        span.set_attribute("previous_subject", previous_subject)
-        span.set_attribute("last_user_message", _get_last_user_message(context))
-        span.set_attribute("history_length", _get_history_length(context))
-        span.set_attribute("langfuse.session_id", session_id)
-        span.set_attribute("langfuse.user_id", userdata.student_identity)
-        span.set_attribute("decision_ms", round((time.perf_counter() - t0) * 1000))
+    with _decision_span("routing.decision") as span:
+        if span.is_recording():
+            span.set_attributes({
+                "session_id": session_id,
+                "from_agent": from_agent,
+                "to_agent": "english",
+                "turn_number": turn_number,
+                "previous_subject": previous_subject,
+                **_text_previews(context, question_summary),
+                "history_length": _get_history_length(context),
+                "langfuse.session_id": session_id,
+                "langfuse.user_id": userdata.student_identity,
+                "decision_ms": round((time.perf_counter() - t0) * 1000),
+            })
 
     asyncio.create_task(transcript_store.save_routing_decision(
         session_id=session_id,
@@ -266,18 +312,20 @@ async def _route_to_orchestrator_impl(agent, context: RunContext, reason: str):
     userdata.route_to("orchestrator")
     # NOTE: do NOT set speaking_agent here — same reason as _route_to_math_impl above.
 
-    with tracer.start_as_current_span("routing.decision") as span:
-        span.set_attribute("session_id", session_id)
-        span.set_attribute("from_agent", from_agent)
-        span.set_attribute("to_agent", "orchestrator")
-        span.set_attribute("turn_number", turn_number)
-        span.set_attribute("question_summary", reason)
-        span.set_attribute("previous_subject", previous_subject)
-        span.set_attribute("last_user_message", _get_last_user_message(context))
-        span.set_attribute("history_length", _get_history_length(context))
-        span.set_attribute("langfuse.session_id", session_id)
-        span.set_attribute("langfuse.user_id", userdata.student_identity)
-        span.set_attribute("decision_ms", round((time.perf_counter() - t0) * 1000))
+    with _decision_span("routing.decision") as span:
+        if span.is_recording():
+            span.set_attributes({
+                "session_id": session_id,
+                "from_agent": from_agent,
+                "to_agent": "orchestrator",
+                "turn_number": turn_number,
+                "previous_subject": previous_subject,
+                **_text_previews(context, reason),
+                "history_length": _get_history_length(context),
+                "langfuse.session_id": session_id,
+                "langfuse.user_id": userdata.student_identity,
+                "decision_ms": round((time.perf_counter() - t0) * 1000),
+            })
 
     asyncio.create_task(transcript_store.save_routing_decision(
         session_id=session_id,
@@ -306,14 +354,19 @@ async def _escalate_impl(agent, context: RunContext, reason: str) -> str:
     userdata.escalation_reason = reason
 
     # OTEL span — highest-priority safety event, must be visible in Langfuse
-    with tracer.start_as_current_span("teacher.escalation") as span:
-        span.set_attribute("langfuse.session_id", session_id)
-        span.set_attribute("langfuse.user_id", userdata.student_identity)
-        span.set_attribute("session.id", session_id)
-        span.set_attribute("from_agent", from_agent)
-        span.set_attribute("reason", reason[:500])
-        span.set_attribute("room_name", room_name)
-        span.set_attribute("turn_number", userdata.turn_number)
+    with _decision_span("teacher.escalation") as span:
+        if span.is_recording():
+            attrs = {
+                "langfuse.session_id": session_id,
+                "langfuse.user_id": userdata.student_identity,
+                "session.id": session_id,
+                "from_agent": from_agent,
+                "room_name": room_name,
+                "turn_number": userdata.turn_number,
+            }
+            if _TRACE_PREVIEW:
+                attrs["reason"] = reason[:500]
+            span.set_attributes(attrs)
 
     asyncio.create_task(transcript_store.save_routing_decision(
         session_id=session_id,